@@ -0,0 +1,2031 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+'''pip-faster is a thin wrapper around pip.
+
+It only adds a --prune option to the `install` subcommand.
+`pip-faster install --prune` will *uninstall* any installed packages that are
+not required.
+
+Otherwise, you should find that pip-faster gives the same results as pip, just
+more quickly, especially in the case of pinned requirements (e.g.
+package-x==1.2.3).
+
+Version control at: https://github.com/yelp/venv-update
+'''
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import atexit
+import errno
+import logging
+import os
+import random
+import shutil
+import sys
+from contextlib import contextmanager
+
+# pip's internals are slow to import: they're loaded on first use, so that e.g. `pip-faster --version` starts quickly
+import pip as pipmodule
+
+from venv_update import colorize
+from venv_update import dump_json
+from venv_update import info
+from venv_update import load_json
+from venv_update import normalize_name
+from venv_update import raise_on_failure
+from venv_update import run
+from venv_update import timid_relpath
+from venv_update import user_cache_dir
+
+# the same object as pip._internal.logger
+logger = logging.getLogger('pip._internal')
+
+# Thanks six!
+PY2 = str is bytes
+if PY2:  # :pragma:nocover:
+    _reraise_src = 'def reraise(tp, value, tb=None): raise tp, value, tb'
+    exec(_reraise_src)
+else:  # :pragma:nocover:
+    def reraise(tp, value, tb=None):
+        if value is None:
+            value = tp()
+        if value.__traceback__ is not tb:
+            raise value.with_traceback(tb)
+        raise value
+
+
+def memoized(func):
+    """Cache the result of a function which takes no arguments."""
+    result = []
+
+    def wrapper():
+        if not result:
+            result.append(func())
+        return result[0]
+    wrapper.__name__ = func.__name__
+    wrapper.__doc__ = func.__doc__
+    return wrapper
+
+
+def import_pkg_resources():
+    # Debian de-vendorizes the version of pip it ships
+    try:  # :pragma:nocover: non-debian
+        from pip._vendor import pkg_resources
+    except ImportError:  # :pragma:nocover: debian
+        import pkg_resources
+    return pkg_resources
+
+
+def install_req_from_line(name):
+    try:  # :pragma:nocover: pip>=18.1
+        from pip._internal.req.constructors import install_req_from_line
+    except ImportError:  # :pragma:nocover: pip<18.1
+        from pip._internal.req import InstallRequirement
+        install_req_from_line = InstallRequirement.from_line
+    return install_req_from_line(name)
+
+
+class CACHE(object):
+    _cache_dir = user_cache_dir()
+    # per-index views of the blobs: wheelhouse/$index_url/$shard/$wheel (see wheel_view_path)
+    wheelhouse = os.path.join(_cache_dir, 'pip-faster', 'wheelhouse')
+    # each wheel is stored once, by content: blobs/$sha256/$wheel
+    blobs = os.path.join(_cache_dir, 'pip-faster', 'blobs')
+    # the (read-only) unpacked contents of those wheels, to install by hardlink: trees/$sha256/
+    trees = os.path.join(_cache_dir, 'pip-faster', 'trees')
+    pip_wheelhouse = os.path.join(_cache_dir, 'pip', 'wheels')
+    # an index of each wheelhouse/$index_url/$shard/ (see shard_manifest)
+    wheelhouse_manifests = os.path.join(_cache_dir, 'pip-faster', 'wheelhouse-manifests')
+    # the sha256 of each of our wheels, by directory (see cached_wheel_sha256)
+    wheel_digests = os.path.join(_cache_dir, 'pip-faster', 'wheel-digests')
+    # advisory locks, one per artifact, shared by every process using the cache (see cache_lock)
+    locks = os.path.join(_cache_dir, 'pip-faster', 'locks')
+    # counters of the cache's use, by every process (see count_stat)
+    stats = os.path.join(_cache_dir, 'pip-faster', 'stats.json')
+    # the index pages of unpinned requirements, with their validators (see pipfaster_index_page_cache)
+    index_pages = os.path.join(_cache_dir, 'pip-faster', 'index-pages')
+    # when each cached file was last used, as the mtime of an empty file named by its inode (see touch)
+    last_used = os.path.join(_cache_dir, 'pip-faster', 'last-used')
+
+
+def wheelhouse_layers():
+    """The wheelhouses to look for wheels in, in order.
+
+    Ours comes first, and is the only one written to. Then come any others in $PIP_FASTER_WHEELHOUSES (separated
+    like $PATH), laid out the same way (e.g. pre-populated, read-only, in a build image).
+    """
+    layers = os.environ.get('PIP_FASTER_WHEELHOUSES', '').split(os.pathsep)
+    return [CACHE.wheelhouse] + [os.path.abspath(os.path.expanduser(layer)) for layer in layers if layer]
+
+
+def wheel_shard(name):
+    """The subdirectory of a wheelhouse for a package's wheels: the start of its normalized name.
+
+    That keeps each directory small (and quick to list) however many wheels are cached.
+    """
+    return normalize_name(name)[:2]
+
+
+def wheel_view_path(index_url, filename, layer=None):
+    """Where a wheel is (or goes) in a wheelhouse (by default, ours): $wheelhouse/$index_url/$shard/$wheel"""
+    if is_flat_layer(index_url, layer):
+        return os.path.join(layer, index_url, filename)
+    return os.path.join(layer or CACHE.wheelhouse, index_url, wheel_shard(parse_wheel_filename(filename)[0]), filename)
+
+
+def is_flat_wheelhouse(wheelhouse):
+    """Whether a wheelhouse/$index_url/ is laid out flat, as pip-faster used to: its wheels aren't in shards"""
+    return os.path.isdir(wheelhouse) and any(filename.endswith('.whl') for filename in os.listdir(wheelhouse))
+
+
+# (layer, index_url) => whether that other wheelhouse is laid out flat, as this process found it
+_flat_layers = {}
+
+
+def is_flat_layer(index_url, layer):
+    """Whether another, maybe read-only, wheelhouse is laid out flat. If so, it's looked up as it is.
+
+    (Ours is migrated instead: see migrate_wheelhouse.)
+    """
+    if layer in (None, CACHE.wheelhouse):
+        return False
+    if (layer, index_url) not in _flat_layers:
+        _flat_layers[layer, index_url] = is_flat_wheelhouse(os.path.join(layer, index_url))
+    return _flat_layers[layer, index_url]
+
+
+def wheelhouse_manifest_path(index_url, shard, layer=None):
+    # outside the wheelhouse, so that writing it doesn't change the wheelhouse's mtime
+    manifests = CACHE.wheelhouse_manifests
+    if layer not in (None, CACHE.wheelhouse):  # another, maybe read-only, layer: we keep its manifests with ours
+        manifests = os.path.join(manifests, 'layers') + layer
+    return os.path.normpath(os.path.join(manifests, index_url, shard)) + '.json'
+
+
+def wheelhouse_mtime(wheelhouse):
+    try:
+        return os.stat(wheelhouse).st_mtime
+    except OSError as error:
+        if error.errno == errno.ENOENT:
+            return None
+        raise
+
+
+# wheel filename => (name, version, tags), as parsed by this process
+_wheel_filenames = {}
+
+
+def parse_wheel_filename(filename):
+    """The (name, version, sorted tags) of a wheel, by its filename"""
+    if filename not in _wheel_filenames:
+        from pip._internal.wheel import Wheel
+        wheel = Wheel(filename)
+        _wheel_filenames[filename] = (wheel.name, wheel.version, sorted('-'.join(tag) for tag in wheel.file_tags))
+    return _wheel_filenames[filename]
+
+
+@memoized
+def supported_tags():
+    """The wheel tags this python supports, e.g. py3-none-any"""
+    from pip._internal.pep425tags import get_supported
+    return frozenset('-'.join(tag) for tag in get_supported())
+
+
+@memoized
+def supported_tag_ranks():
+    """{tag: rank} of the wheel tags this python supports, the most specific (e.g. cp36-cp36m-manylinux1_x86_64) first"""
+    from pip._internal.pep425tags import get_supported
+    ranks = {}
+    for rank, tag in enumerate(get_supported()):
+        ranks.setdefault('-'.join(tag), rank)
+    return ranks
+
+
+def add_wheel_entry(wheels, filename):
+    """Record a wheel in a manifest: [version, tags, filename], by its normalized name"""
+    name, version, tags = parse_wheel_filename(filename)
+    entries = wheels.setdefault(normalize_name(name), [])
+    entries[:] = [entry for entry in entries if entry[2] != filename]
+    entries.append([version, tags, filename])
+
+
+def build_wheelhouse_manifest(index_url, shard, layer=None):
+    """Index the wheels of a wheelhouse's shard by their normalized name."""
+    from pip._internal.exceptions import InvalidWheelFilename
+
+    shard_dir = os.path.join(layer or CACHE.wheelhouse, index_url, shard)
+    mtime = wheelhouse_mtime(shard_dir)
+    wheels = {}
+    if mtime is not None:
+        for filename in sorted(os.listdir(shard_dir)):
+            if not filename.endswith('.whl'):  # e.g. half-copied
+                continue
+            try:
+                add_wheel_entry(wheels, filename)
+            except InvalidWheelFilename:
+                continue
+        dump_json(wheelhouse_manifest_path(index_url, shard, layer), {'mtime': mtime, 'wheels': wheels})
+    return {'mtime': mtime, 'wheels': wheels}
+
+
+# wheelhouse shard => its manifest, as last read (or built) by this process
+_wheelhouse_manifests = {}
+
+
+def shard_manifest(index_url, shard, layer=None):
+    """{normalized name: [[version, tags, filename], ...]} for the wheels in a wheelhouse's shard (by default, ours).
+
+    The on-disk manifest is rebuilt whenever the shard changed without it.
+    """
+    if layer in (None, CACHE.wheelhouse):
+        migrate_wheelhouse(index_url)
+    elif is_flat_layer(index_url, layer):  # the whole wheelhouse/$index_url/ is its one shard
+        shard = ''
+    shard_dir = os.path.join(layer or CACHE.wheelhouse, index_url, shard)
+    mtime = wheelhouse_mtime(shard_dir)
+    manifest = _wheelhouse_manifests.get(shard_dir)
+    if manifest is None or manifest['mtime'] != mtime:
+        manifest = load_json(wheelhouse_manifest_path(index_url, shard, layer))
+        if not manifest or manifest['mtime'] != mtime:
+            manifest = build_wheelhouse_manifest(index_url, shard, layer)
+        _wheelhouse_manifests[shard_dir] = manifest
+    return manifest['wheels']
+
+
+def wheelhouse_manifest(index_url, layer=None):
+    """The manifest of a whole wheelhouse (by default, ours), shard by shard. To look up a package, see shard_manifest."""
+    if layer in (None, CACHE.wheelhouse):
+        migrate_wheelhouse(index_url)
+    elif is_flat_layer(index_url, layer):
+        return dict(shard_manifest(index_url, '', layer))
+    wheelhouse = os.path.join(layer or CACHE.wheelhouse, index_url)
+    wheels = {}
+    for shard in sorted(os.listdir(wheelhouse)) if os.path.isdir(wheelhouse) else ():
+        if os.path.isdir(os.path.join(wheelhouse, shard)):
+            wheels.update(shard_manifest(index_url, shard, layer))
+    return wheels
+
+
+# the indexes whose wheelhouse (of ours) this process has checked for the flat layout
+_migrated_wheelhouses = set()
+
+
+def migrate_wheelhouse(index_url):
+    """Move the wheels of a flat wheelhouse/$index_url/, as pip-faster used to lay them out, into their shards."""
+    if index_url in _migrated_wheelhouses:
+        return
+    wheelhouse = os.path.join(CACHE.wheelhouse, index_url)
+    if is_flat_wheelhouse(wheelhouse):
+        with cache_lock('migrate-wheelhouse'):
+            views = [move_into_shard(index_url, filename) for filename in sorted(os.listdir(wheelhouse))]
+            migrate_flat_records(index_url, [view for view in views if view is not None])
+            logger.info('Moved the wheels in %s into subdirectories, by name.', wheelhouse)
+    _migrated_wheelhouses.add(index_url)
+
+
+def move_into_shard(index_url, filename):
+    """Move a wheel of our flat wheelhouse/$index_url/ into its shard. Returns where it went; None if it's no wheel."""
+    from pip._internal.exceptions import InvalidWheelFilename
+
+    if not filename.endswith('.whl'):
+        return None
+    try:
+        view = wheel_view_path(index_url, filename)
+    except InvalidWheelFilename:
+        return None
+    mkdirp(os.path.dirname(view))
+    try:
+        os.rename(os.path.join(CACHE.wheelhouse, index_url, filename), view)
+    except OSError as error:  # moved by a concurrent migration
+        if error.errno != errno.ENOENT:
+            raise
+    return view
+
+
+def migrate_flat_records(index_url, views):
+    """Move the digests recorded for our flat wheelhouse/$index_url/ to its wheels' shards; drop its manifest."""
+    wheelhouse = os.path.join(CACHE.wheelhouse, index_url)
+    # keep the digests we recorded, rather than rehash every wheel
+    digests = load_json(sidecar_index_path(CACHE.wheel_digests, wheelhouse))
+    shard_digests = {}
+    for view in views:
+        filename = os.path.basename(view)
+        if filename in digests:
+            shard_digests.setdefault(os.path.dirname(view), {})[filename] = digests[filename]
+
+    for shard_dir, recorded in shard_digests.items():
+        digests_path = sidecar_index_path(CACHE.wheel_digests, shard_dir)
+        shard_recorded = load_json(digests_path)
+        shard_recorded.update(recorded)
+        dump_json(digests_path, shard_recorded)
+
+    # the flat layout's manifest and digests
+    for path in (
+            os.path.normpath(os.path.join(CACHE.wheelhouse_manifests, index_url)) + '.json',
+            sidecar_index_path(CACHE.wheel_digests, wheelhouse),
+    ):
+        try:
+            os.remove(path)
+        except OSError:  # e.g. never written
+            pass
+
+
+def optimistic_wheel_search(req, index_urls):
+    from itertools import chain
+    from pip._internal.index import Link
+
+    name = normalize_name(req.name)
+    pinned = pinned_version(req)
+    layers = wheelhouse_layers()
+
+    for index_url in index_urls:
+        for layer in layers:
+            entries = shard_manifest(index_url, wheel_shard(name), layer).get(name, ())
+            # the fast path: a wheel of exactly the pinned version, as written; else any version the specifier allows
+            candidates = chain(
+                (entry for entry in entries if entry[0] == pinned),
+                (entry for entry in entries if req.specifier.contains(entry[0])),
+            )
+            for version, tags, filename in candidates:
+                if not supported_tags().isdisjoint(tags):
+                    return Link('file:' + touch(wheel_view_path(index_url, filename, layer)))
+
+
+def best_wheel_search(req, index_urls):
+    """The (version, link) of the best wheel for this python that satisfies a requirement, in our wheelhouses alone.
+
+    That's the highest version, then the most specific wheel of it, as pip would choose. None if there's none.
+    """
+    from pip._internal.index import Link
+    parse_version = import_pkg_resources().parse_version
+
+    name = normalize_name(req.name)
+    best = None
+    for index_url in index_urls:
+        for layer in wheelhouse_layers():
+            for version, tags, filename in shard_manifest(index_url, wheel_shard(name), layer).get(name, ()):
+                if supported_tags().isdisjoint(tags) or not req.specifier.contains(version):
+                    continue
+                rank = min(supported_tag_ranks().get(tag, sys.maxsize) for tag in tags)
+                key = (parse_version(version), -rank)
+                if best is None or key > best[0]:
+                    best = key, wheel_view_path(index_url, filename, layer)
+
+    if best is None:
+        return None
+    (version, _), wheel_path = best
+    return version, Link('file:' + touch(wheel_path))
+
+
+def pinned_version(requirement):
+    """The version a requirement is pinned to, by a ==, if any"""
+    if not requirement:
+        # url-style requirement
+        return None
+
+    for spec in requirement.specifier:
+        if spec.operator == '==' and not spec.version.endswith('.*'):
+            return spec.version
+    return None
+
+
+def is_req_pinned(requirement):
+    return pinned_version(requirement) is not None
+
+
+def pinned_wheel_search(req, index_urls, session):
+    """A wheel for a requirement pinned by ==, found without searching the index. None if there's none.
+
+    Raises BestVersionAlreadyInstalled if it's installed already.
+    """
+    from pip._internal.index import BestVersionAlreadyInstalled
+
+    # first try to use any installed package that satisfies the req
+    if req.satisfied_by:
+        logger.info('Faster! pinned requirement already installed.')
+        count_stat('already_installed')
+        raise BestVersionAlreadyInstalled
+
+    # then try an optimistic search for a .whl file:
+    link = optimistic_wheel_search(req.req, index_urls)
+    if link is not None:
+        count_cache_hit('wheelhouse_hits', link.path)
+        return link
+    # which another machine may have built already
+    return remote_wheel_search(req.req, index_urls, session)
+
+
+def find_requirement_offline(finder, req):
+    """Find the best wheel for a requirement in our wheelhouses alone, never touching the network."""
+    from pip._internal.exceptions import DistributionNotFound
+    from pip._internal.index import BestVersionAlreadyInstalled
+
+    found = best_wheel_search(req.req, finder.index_urls)
+    if req.satisfied_by is not None and (found is None or found[0] <= req.satisfied_by.parsed_version):
+        logger.info('Offline: requirement already installed.')
+        count_stat('already_installed')
+        raise BestVersionAlreadyInstalled
+    elif found is None:
+        raise DistributionNotFound('No wheel for {} in the pip-faster cache (offline)'.format(req))
+
+    link = found[1]
+    logger.info('Offline: found %s in the pip-faster cache.', link.filename)
+    count_cache_hit('wheelhouse_hits', link.path)
+    return link
+
+
+@memoized
+def faster_package_finder():
+    from pip._internal.exceptions import DistributionNotFound
+    from pip._internal.index import PackageFinder
+
+    class FasterPackageFinder(PackageFinder):
+
+        def find_requirement(self, req, upgrade):
+            if is_req_pinned(req.req):
+                # if the version is pinned-down by a ==
+                link = pinned_wheel_search(req, self.index_urls, self.session)
+                if link is None:
+                    # The wheel will be built during prepare_files
+                    logger.debug('No wheel found locally for pinned requirement %s', req)
+                else:
+                    logger.info('Faster! Pinned wheel found, without hitting PyPI.')
+                    return link
+            else:
+                # unpinned requirements aren't very notable. only show with -v
+                logger.info('slow: full search for unpinned requirement %s', req)
+
+            # otherwise, do the full network search, per usual
+            count_stat('network_searches')
+            try:
+                link = super(FasterPackageFinder, self).find_requirement(req, upgrade)
+            except DistributionNotFound:
+                exc_info = sys.exc_info()
+                # Best effort: try and install from suitable version on-disk
+                link = optimistic_wheel_search(req.req, self.index_urls)
+                if link:
+                    return link
+                else:
+                    reraise(*exc_info)
+
+            if link is not None:
+                # remember where it's from, to cache the wheel pip may build from it
+                req.pipfaster_index_url = link_index_url(link, self.index_urls)
+                # we may have this very wheel already, e.g. downloaded via another mirror
+                cached_link = cached_wheel_link(link, self.index_urls)
+                if cached_link is not None:
+                    count_cache_hit('downloads_avoided', cached_link.path)
+                    link = cached_link
+            return link
+
+    return FasterPackageFinder
+
+
+def last_used_path(stat):
+    return os.path.join(CACHE.last_used, '{}-{}'.format(stat.st_dev, stat.st_ino))
+
+
+def touch(path):
+    """Mark a cached wheel (or tree) as recently used: cache_gc evicts the least-recently used.
+
+    A wheel's own mtime is part of its identity (see file_identity), so its use is marked on a file of its own.
+    """
+    if not path.startswith((CACHE.wheelhouse, CACHE.blobs, CACHE.trees)):  # e.g. a read-only, shared layer
+        return path
+    try:
+        if os.path.isdir(path):
+            os.utime(path, None)
+            return path
+        marker = last_used_path(os.stat(path))
+        try:
+            os.utime(marker, None)
+        except OSError as error:
+            if error.errno != errno.ENOENT:
+                raise
+            mkdirp(CACHE.last_used)
+            open(marker, 'a').close()
+    except OSError:  # e.g. removed by a concurrent gc
+        pass
+    return path
+
+
+def last_used(stat):
+    """When a cached file was last used (see touch): if never since it was cached, its mtime."""
+    try:
+        return max(stat.st_mtime, os.path.getmtime(last_used_path(stat)))
+    except OSError:
+        return stat.st_mtime
+
+
+# never evict wheels used this recently (seconds): a concurrent install may be about to read them
+CACHE_GC_GRACE = 60 * 60
+
+
+def parse_size(size):
+    """A number of bytes, from e.g. 1024, 1.5M or 10G"""
+    number = size.strip().upper().rstrip('B').rstrip('I')
+    power = 0
+    if number.endswith(tuple('KMGT')):
+        power = 'KMGT'.index(number[-1]) + 1
+        number = number[:-1]
+    try:
+        return int(float(number) * 1024 ** power)
+    except (ValueError, OverflowError):
+        raise ValueError('not a size: {}'.format(size))
+
+
+def parse_age(days):
+    """A number of seconds, from a number of days"""
+    return float(days) * 24 * 60 * 60
+
+
+def cache_entries():
+    """Each file in the cache, as [last used, size, paths], least-recently used first.
+
+    A wheel's blob and its views are (usually) links to one file; they're used, and evicted, together (with the
+    record of its use).
+    """
+    entries = {}
+    for top in (CACHE.blobs, CACHE.wheelhouse):
+        for dirpath, _, filenames in os.walk(top):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                try:
+                    stat = os.stat(path)
+                except OSError:  # removed, meanwhile
+                    continue
+                key = (stat.st_dev, stat.st_ino)
+                if key not in entries:
+                    entries[key] = [last_used(stat), stat.st_size, [last_used_path(stat)]]
+                entries[key][2].append(path)
+
+    # each unpacked wheel is used, and evicted, as a whole
+    for tree in os.listdir(CACHE.trees) if os.path.isdir(CACHE.trees) else ():
+        tree = os.path.join(CACHE.trees, tree)
+        size = sum(
+            os.path.getsize(os.path.join(dirpath, filename))
+            for dirpath, _, filenames in os.walk(tree)
+            for filename in filenames
+        )
+        entries[tree] = [os.path.getmtime(tree), size, [tree]]
+    return sorted(entries.values(), key=lambda entry: entry[0])
+
+
+def cache_gc(max_size=None, max_age=None):
+    """Evict the least-recently used wheels until the cache is within max_size (bytes) and max_age (seconds).
+
+    Returns the number of files removed, and their total size.
+    """
+    import time
+    now = time.time()
+    entries = cache_entries()
+    total = sum(size for _, size, _ in entries)
+    removed = freed = 0
+    evicted = []
+    for used, size, paths in entries:
+        if now - used < CACHE_GC_GRACE:
+            break
+        elif (max_age is None or now - used <= max_age) and (max_size is None or total <= max_size):
+            break
+
+        for path in paths:
+            evict(path)
+        evicted.extend(paths)
+        total -= size
+        freed += size
+        removed += 1
+    forget_evicted(evicted)
+    return removed, freed
+
+
+def evict(path):
+    """Remove a file (or unpacked tree) from the cache"""
+    try:
+        if path.startswith(CACHE.trees):
+            shutil.rmtree(path)
+        else:
+            os.remove(path)
+    except OSError as error:  # removed by a concurrent gc
+        if error.errno != errno.ENOENT:
+            raise
+    if path.startswith(CACHE.blobs):
+        try:
+            os.rmdir(os.path.dirname(path))
+        except OSError:  # not empty
+            pass
+
+
+def forget_evicted(paths):
+    """Drop what we recorded about some evicted wheels: their entries in the index of their digests.
+
+    Their locks are left be: another process may hold one, and a lock removed from under it would no longer exclude
+    a store of the same blob.
+    """
+    indexes = {}
+    for path in paths:
+        if path.startswith(CACHE.wheelhouse) or (path.startswith(CACHE.blobs) and path.endswith('.whl')):
+            indexes.setdefault(
+                sidecar_index_path(CACHE.wheel_digests, os.path.dirname(path)), set(),
+            ).add(os.path.basename(path))
+
+    for index_path, filenames in indexes.items():
+        index = load_json(index_path)
+        if filenames.isdisjoint(index):
+            continue
+        for filename in filenames:
+            index.pop(filename, None)
+        if index:
+            dump_json(index_path, index)
+        else:
+            evict(index_path)
+
+
+def cache_gc_main(args):
+    """pip-faster cache gc [--max-size SIZE] [--max-age DAYS]"""
+    from argparse import ArgumentParser
+    parser = ArgumentParser(
+        prog='pip-faster cache gc',
+        description='Evict the least-recently used wheels from the pip-faster cache.',
+    )
+    parser.add_argument(
+        '--max-size', type=parse_size, default=os.environ.get('PIP_CACHE_MAX_SIZE'),
+        help='Shrink the cache to at most this size, e.g. 10G. Default: $PIP_CACHE_MAX_SIZE',
+    )
+    parser.add_argument(
+        '--max-age', type=parse_age, default=os.environ.get('PIP_CACHE_MAX_AGE'),
+        help='Evict wheels unused for this many days. Default: $PIP_CACHE_MAX_AGE',
+    )
+    options = parser.parse_args(args)
+    if options.max_size is None and options.max_age is None:
+        parser.error('one of --max-size or --max-age is required')
+
+    removed, freed = cache_gc(options.max_size, options.max_age)
+    info('Removed {} files ({} bytes) from {}'.format(removed, freed, os.path.dirname(CACHE.wheelhouse)))
+
+
+def cache_stats_main(args):
+    """pip-faster cache stats [--json]"""
+    from argparse import ArgumentParser
+    parser = ArgumentParser(
+        prog='pip-faster cache stats',
+        description='Show how often the pip-faster cache saved work, by every process using it.',
+    )
+    parser.add_argument('--json', action='store_true', help='Print the counters as JSON.')
+    options = parser.parse_args(args)
+
+    stats = load_json(CACHE.stats)
+    if options.json:
+        import json
+        info(json.dumps(stats, indent=1, sort_keys=True))
+        return
+
+    info('Statistics of {}:'.format(os.path.dirname(CACHE.wheelhouse)))
+    for name, value in sorted(stats.items()):
+        info('  {}: {}'.format(name.replace('_', ' '), value))
+    hits = sum(stats.get(name, 0) for name in ('already_installed', 'wheelhouse_hits', 'remote_fetches'))
+    searches = hits + stats.get('network_searches', 0)
+    if searches:
+        info('  {:.0%} of requirements found without searching the index'.format(hits / float(searches)))
+
+
+def _can_be_cached(package):
+    return (
+        package.is_wheel and
+        # An assertion that we're looking in the pip wheel dir
+        package.link.path.startswith(CACHE.pip_wheelhouse)
+    )
+
+
+def mkdirp(pth):
+    try:
+        os.makedirs(pth)
+    except OSError as e:
+        if e.errno != errno.EEXIST:
+            raise
+
+
+@contextmanager
+def flock(path):
+    """Hold an exclusive advisory lock on a file, waiting for it if need be. Yields whether we had to wait."""
+    try:
+        import fcntl
+    except ImportError:  # :pragma:nocover: windows: no locking
+        yield False
+        return
+
+    mkdirp(os.path.dirname(path))
+    with open(path, 'a') as lock_file:
+        try:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            waited = False
+        except (IOError, OSError) as error:
+            if error.errno not in (errno.EAGAIN, errno.EACCES):
+                raise
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            waited = True
+        try:
+            yield waited
+        finally:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+# what this process has added to the cache's counters, not written yet (see flush_stats)
+_stats = {}
+
+
+def count_stats(**amounts):
+    """Add to some of the cache's counters. They're written once, as this process exits."""
+    for name, amount in amounts.items():
+        _stats[name] = _stats.get(name, 0) + amount
+
+
+@atexit.register
+def flush_stats():
+    """Add this process's counts to the cache's counters, which are shared by every process using the cache."""
+    if not _stats:
+        return
+    with flock(CACHE.stats + '.lock'):
+        stats = load_json(CACHE.stats)
+        for name, amount in _stats.items():
+            stats[name] = stats.get(name, 0) + amount
+        dump_json(CACHE.stats, stats)
+    _stats.clear()
+
+
+def count_stat(name, amount=1):
+    count_stats(**{name: amount})
+
+
+def count_cache_hit(name, wheel_path):
+    """Count a use of a cached wheel, and the download it saved."""
+    try:
+        size = os.path.getsize(wheel_path)
+    except OSError:  # e.g. evicted, meanwhile
+        size = 0
+    count_stats(bytes_saved=size, **{name: 1})
+
+
+@contextmanager
+def cache_lock(key):
+    """Hold one artifact of the cache (e.g. a wheel being built) for this process alone, waiting for any other.
+
+    Yields whether we waited: if so, the other process has likely done our work for us.
+    """
+    with flock(os.path.join(CACHE.locks, key + '.lock')) as waited:
+        if waited:
+            logger.info('Waited for another process using %s', key)
+            count_stat('lock_waits')
+        yield waited
+
+
+# from linux/fs.h: _IOW(0x94, 9, int)
+FICLONE = 0x40049409
+
+
+def reflink(src, dst):
+    """Make dst a copy-on-write clone of src, sharing its data on disk (linux: btrfs, xfs, ...)"""
+    import fcntl
+    with open(src, 'rb') as src_file:
+        with open(dst, 'wb') as dst_file:
+            fcntl.ioctl(dst_file.fileno(), FICLONE, src_file.fileno())
+    shutil.copymode(src, dst)
+
+
+def link_or_copy(src, dst):
+    """Make dst (a new path) have the same contents as src, as cheaply as possible.
+
+    Returns the method used: reflink, hardlink or copy.
+    """
+    try:
+        reflink(src, dst)
+        return 'reflink'
+    except (ImportError, IOError, OSError):  # not linux, or not supported by the filesystem
+        if os.path.exists(dst):
+            os.remove(dst)
+
+    try:
+        os.link(src, dst)
+        return 'hardlink'
+    except (AttributeError, OSError):  # no os.link (windows, python2), or across filesystems
+        pass
+
+    shutil.copy(src, dst)
+    return 'copy'
+
+
+def hardlink_or_copy(src, dst):
+    """As link_or_copy, but a hardlink first: each link of a blob is then the same file, to the cache's bookkeeping.
+
+    Only where that's impossible (e.g. across devices) is a reflink or copy made.
+    """
+    try:
+        os.link(src, dst)
+        return 'hardlink'
+    except (AttributeError, OSError):  # no os.link (windows, python2), or across filesystems
+        return link_or_copy(src, dst)
+
+
+def file_sha256(path):
+    """The sha256 of a file, hashed straight from a memory map of it."""
+    import mmap
+    from hashlib import sha256
+    digest = sha256()
+    with open(path, 'rb') as file_:
+        try:
+            mapped = mmap.mmap(file_.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # an empty file can't be mapped
+            pass
+        else:
+            try:
+                digest.update(mapped)
+            finally:
+                mapped.close()
+    return digest.hexdigest()
+
+
+def sidecar_index_path(sidecars, directory):
+    """The index (under sidecars, e.g. CACHE.wheel_digests) of what we record about the files in one directory.
+
+    It's kept outside the directory, so that writing it doesn't change the directory's mtime. The indexes of
+    another, maybe read-only, wheelhouse layer are kept with ours.
+    """
+    directory = os.path.normpath(directory)
+    if directory.startswith(os.path.normpath(CACHE.wheelhouse) + os.sep):
+        index = os.path.join(sidecars, os.path.relpath(directory, CACHE.wheelhouse))
+    elif directory.startswith(os.path.normpath(CACHE.blobs) + os.sep):
+        index = os.path.join(sidecars, 'blobs', os.path.relpath(directory, CACHE.blobs))
+    else:
+        index = os.path.join(sidecars, 'layers') + directory
+    return os.path.normpath(index) + '.json'
+
+
+def file_identity(path):
+    """[size, inode, mtime]: a wheel replaced (renamed over), or rewritten in place, has a new identity.
+
+    Our wheels are usually hardlinks: to pip's cached wheels, or to the user's own files, which may be rewritten.
+    """
+    stat = os.stat(path)
+    return [stat.st_size, stat.st_ino, getattr(stat, 'st_mtime_ns', stat.st_mtime)]
+
+
+def record_in_sidecar(sidecars, path, value):
+    """Record something about a wheel (e.g. its sha256), for as long as it's unchanged. Returns that value."""
+    index_path = sidecar_index_path(sidecars, os.path.dirname(path))
+    # a concurrent writer may drop our entry: it's just worked out again, next time
+    index = load_json(index_path)
+    index[os.path.basename(path)] = [value] + file_identity(path)
+    dump_json(index_path, index)
+    return value
+
+
+def recorded_in_sidecar(sidecars, path):
+    """[value] recorded about a wheel, if it's unchanged since. Else None."""
+    path = os.path.normpath(path)
+    recorded = load_json(sidecar_index_path(sidecars, os.path.dirname(path))).get(os.path.basename(path))
+    if recorded and recorded[1:] == file_identity(path):
+        return recorded[:1]
+    return None
+
+
+def cached_wheel_sha256(path):
+    """The sha256 of one of our cached wheels, as recorded when it was cached. None for any other file.
+
+    The wheel is rehashed (and its digest recorded anew) only if it has changed since.
+    """
+    path = os.path.normpath(path)
+    if not path.startswith((CACHE.blobs, CACHE.wheelhouse)):
+        return None
+    recorded = recorded_in_sidecar(CACHE.wheel_digests, path)
+    return recorded[0] if recorded else record_in_sidecar(CACHE.wheel_digests, path, file_sha256(path))
+
+
+def blob_path(digest, filename):
+    return os.path.join(CACHE.blobs, digest, filename)
+
+
+def _store_blob(file_path, digest):
+    """Store a wheel by its content, unless it's already there (and unchanged: it may be a link to a user's file)."""
+    blob = blob_path(digest, os.path.basename(file_path))
+    if os.path.exists(blob) and cached_wheel_sha256(blob) == digest:
+        return blob
+    with cache_lock('blob-' + digest):
+        if os.path.exists(blob) and cached_wheel_sha256(blob) == digest:  # stored by another process, meanwhile
+            count_stat('stores_avoided')
+            return blob
+        blob_tmp = '{}.{}'.format(blob, random.randint(0, sys.maxsize))
+        mkdirp(os.path.dirname(blob))
+        method = link_or_copy(file_path, blob_tmp)
+        os.rename(blob_tmp, blob)
+        record_in_sidecar(CACHE.wheel_digests, blob, digest)
+        logger.debug('Stored %s as %s (%s)', os.path.basename(file_path), digest, method)
+    return blob
+
+
+def _store_wheel_in_cache(file_path, index_url):
+    filename = os.path.basename(file_path)
+    digest = file_sha256(file_path)
+    blob = _store_blob(file_path, digest)
+    cache = wheel_view_path(index_url, filename)
+    cache_tmp = '{}.{}'.format(cache, random.randint(0, sys.maxsize))
+    cache_dir = os.path.dirname(cache)
+    shard = os.path.basename(cache_dir)
+    migrate_wheelhouse(index_url)
+    mkdirp(cache_dir)
+    manifest_path = wheelhouse_manifest_path(index_url, shard)
+    # one store at a time in each shard: concurrent ones would drop each other's entries from its manifest
+    with cache_lock('manifest-' + os.path.relpath(manifest_path, CACHE.wheelhouse_manifests)):
+        manifest = load_json(manifest_path)
+        up_to_date = manifest and manifest['mtime'] == wheelhouse_mtime(cache_dir)
+        # Atomicity
+        method = hardlink_or_copy(blob, cache_tmp)
+        os.rename(cache_tmp, cache)
+
+        # keep the manifest up to date, rather than rebuilding it next time
+        if up_to_date:
+            add_wheel_entry(manifest['wheels'], filename)
+            manifest['mtime'] = wheelhouse_mtime(cache_dir)
+            dump_json(manifest_path, manifest)
+        else:
+            manifest = build_wheelhouse_manifest(index_url, shard)
+        _wheelhouse_manifests[cache_dir] = manifest
+
+    touch(cache)
+    record_in_sidecar(CACHE.wheel_digests, cache, digest)
+    logger.debug('Cached %s (%s)', filename, method)
+    return method
+
+
+def cache_installed_wheels(index_url, installed_packages):
+    """After installation, pip tells us what it installed and from where.
+
+    We build a structure that looks like
+
+    .cache/pip-faster/wheelhouse/$index_url/$shard/$wheel
+
+    of views of the blobs (see wheel_view_path). Each package is filed under the index its link was found on (see
+    FasterPackageFinder), else index_url.
+    Wheels that pip built were cached already, as they were built (see pipfaster_build_cacher).
+    """
+    for installed_package in installed_packages:
+        if not _can_be_cached(installed_package):
+            continue
+        if getattr(installed_package, 'pipfaster_cached', False):
+            continue
+        cache_wheel(installed_package, installed_package.link.path, index_url)
+
+
+def cache_wheel(package, wheel_path, index_url):
+    """Cache a package's wheel under the index it came from. Returns that index, if any."""
+    source_index_url = getattr(package, 'pipfaster_index_url', None) or index_url
+    if source_index_url is not None:
+        _store_wheel_in_cache(wheel_path, source_index_url)
+        package.pipfaster_cached = True
+    return source_index_url
+
+
+# seconds to wait on the remote wheelhouse: it's only ever a shortcut, past building the wheel ourselves
+REMOTE_WHEELHOUSE_TIMEOUT = 5
+
+# the remote wheelhouses (by url) which this process couldn't reach: they aren't tried again
+_unreachable_remotes = set()
+
+
+class RemoteWheelhouse(object):
+    """A wheelhouse shared over HTTP, by any static file server which also accepts PUT.
+
+    It's laid out by index, $url/$index_url/$wheel, but (unlike ours) not in shards: a package's wheels are found by
+    their listing (with their sha256), $url/$index_url/$normalized_name.json
+    """
+
+    def __init__(self, url, session):
+        from pip._vendor.requests import Session
+        self.url = url.rstrip('/')
+        # with pip's settings (certificates, proxies, ...), but not its retries: each would hold up the install
+        self.session = Session()
+        self.session.headers.update(session.headers)
+        self.session.auth = session.auth
+        self.session.proxies = session.proxies
+        self.session.verify = session.verify
+        self.session.cert = session.cert
+
+    def _url(self, index_url, filename):
+        import posixpath
+        from pip._vendor.six.moves.urllib.parse import quote
+        return '/'.join((self.url, quote(posixpath.normpath(index_url)), quote(filename)))
+
+    def listing(self, index_url, name):
+        """{filename: sha256} of a package's wheels"""
+        response = self.session.get(self._url(index_url, name + '.json'), timeout=REMOTE_WHEELHOUSE_TIMEOUT)
+        if response.status_code == 404:
+            return {}
+        response.raise_for_status()
+        return response.json()
+
+    def fetch(self, req, index_url):
+        """Download a wheel, for this python, which satisfies a requirement, into our wheelhouse. Returns success."""
+        import tempfile
+        for filename, digest in sorted(self.listing(index_url, normalize_name(req.name)).items()):
+            _, version, tags = parse_wheel_filename(filename)
+            if not req.specifier.contains(version) or supported_tags().isdisjoint(tags):
+                continue
+
+            tmpdir = tempfile.mkdtemp()
+            try:
+                wheel_path = os.path.join(tmpdir, filename)
+                self.download(self._url(index_url, filename), wheel_path)
+                if file_sha256(wheel_path) != digest:
+                    logger.warning('Ignoring %s from %s: its sha256 is not as listed.', filename, self.url)
+                    continue
+                _store_wheel_in_cache(wheel_path, index_url)
+            finally:
+                shutil.rmtree(tmpdir)
+            count_stat('remote_fetches')
+            return True
+        return False
+
+    def download(self, url, path):
+        """Stream a file to disk, a chunk at a time"""
+        from contextlib import closing
+        with closing(self.session.get(url, stream=True, timeout=REMOTE_WHEELHOUSE_TIMEOUT)) as response:
+            response.raise_for_status()
+            with open(path, 'wb') as download:
+                for chunk in response.iter_content(chunk_size=64 * 1024):
+                    download.write(chunk)
+
+    def upload(self, index_url, wheel_path):
+        """Share one of our wheels (unless it's shared already)"""
+        import json
+        filename = os.path.basename(wheel_path)
+        name = normalize_name(parse_wheel_filename(filename)[0])
+        listing = self.listing(index_url, name)
+        if filename in listing:
+            return
+        with open(wheel_path, 'rb') as wheel_file:
+            self.session.put(
+                self._url(index_url, filename), data=wheel_file, timeout=REMOTE_WHEELHOUSE_TIMEOUT,
+            ).raise_for_status()
+        # a concurrent upload may drop our entry: the wheel is just uploaded again, by its next build
+        listing[filename] = file_sha256(wheel_path)
+        self.session.put(
+            self._url(index_url, name + '.json'), data=json.dumps(listing, sort_keys=True), timeout=REMOTE_WHEELHOUSE_TIMEOUT,
+        ).raise_for_status()
+        count_stat('remote_uploads')
+
+
+# url scheme => the kind of remote wheelhouse to use
+REMOTE_WHEELHOUSES = {
+    'http': RemoteWheelhouse,
+    'https': RemoteWheelhouse,
+}
+
+
+def remote_wheelhouse(session):
+    """The remote wheelhouse in $PIP_FASTER_REMOTE_WHEELHOUSE, if any (and not found unreachable already)."""
+    url = os.environ.get('PIP_FASTER_REMOTE_WHEELHOUSE')
+    if not url or url.rstrip('/') in _unreachable_remotes:
+        return None
+    scheme = url.split(':', 1)[0]
+    if scheme not in REMOTE_WHEELHOUSES:
+        logger.warning('Ignoring $PIP_FASTER_REMOTE_WHEELHOUSE: unsupported url scheme: %s', scheme)
+        return None
+    return REMOTE_WHEELHOUSES[scheme](url, session)
+
+
+def remote_wheel_search(req, index_urls, session):
+    """Look for a wheel in the remote wheelhouse, on a miss in ours. If found, it's fetched into ours."""
+    from pip._vendor.requests import ConnectionError
+    from pip._vendor.requests import RequestException
+    from pip._vendor.requests import Timeout
+
+    remote = remote_wheelhouse(session)
+    if remote is None:
+        return None
+    for index_url in index_urls:
+        try:
+            fetched = remote.fetch(req, index_url)
+        except (ConnectionError, Timeout) as error:
+            logger.warning('Could not reach the remote wheelhouse, %s: %s (not trying it again)', remote.url, error)
+            _unreachable_remotes.add(remote.url)
+            return None
+        except (RequestException, ValueError) as error:  # ValueError: an invalid listing
+            logger.warning('Could not search the remote wheelhouse, %s: %s', remote.url, error)
+            return None
+        if fetched:
+            return optimistic_wheel_search(req, [index_url])
+
+
+def upload_built_wheels(session, built):
+    """Share the wheels we built, as [(index_url, wheel_path)], via the remote wheelhouse, if any."""
+    from pip._vendor.requests import ConnectionError
+    from pip._vendor.requests import RequestException
+    from pip._vendor.requests import Timeout
+
+    remote = remote_wheelhouse(session)
+    if remote is None:
+        return
+    for index_url, wheel_path in built:
+        try:
+            remote.upload(index_url, wheel_path)
+        except (ConnectionError, Timeout) as error:
+            logger.warning('Could not reach the remote wheelhouse, %s: %s (not trying it again)', remote.url, error)
+            _unreachable_remotes.add(remote.url)
+            return
+        except (RequestException, ValueError) as error:
+            logger.warning('Could not upload %s to %s: %s', os.path.basename(wheel_path), remote.url, error)
+
+
+def link_index_url(link, index_urls):
+    """Which of these indexes was this link found on, if any?"""
+    from pip._internal.index import HTMLPage
+
+    for index_url in index_urls:
+        if (
+                # pip <18.1
+                isinstance(link.comes_from, HTMLPage) and
+                link.comes_from.url.startswith(index_url)
+        ) or (
+                # pip >= 18.1
+                isinstance(link.comes_from, (str, type(''))) and
+                link.comes_from.startswith(index_url)
+        ):
+            return index_url
+
+
+def cached_wheel_link(link, index_urls):
+    """If we've stored this exact (by sha256) wheel before, from any index, link to our copy instead."""
+    from pip._internal.index import Link
+
+    if not (link.is_wheel and link.hash_name == 'sha256'):
+        return None
+    blob = blob_path(link.hash, link.filename)
+    if not os.path.exists(blob):
+        return None
+
+    index_url = link_index_url(link, index_urls)
+    if index_url is None:
+        return Link('file:' + touch(blob))
+    view = wheel_view_path(index_url, link.filename)
+    if not os.path.exists(view):
+        _store_wheel_in_cache(blob, index_url)
+    return Link('file:' + touch(view))
+
+
+def get_patched_download_http_url(orig_download_http_url, index_urls):
+    def pipfaster_download_http_url(link, *args, **kwargs):
+        file_path, content_type = orig_download_http_url(link, *args, **kwargs)
+        if link.is_wheel:
+            index_url = link_index_url(link, index_urls)
+            if index_url is not None:
+                _store_wheel_in_cache(file_path, index_url)
+        return file_path, content_type
+    return pipfaster_download_http_url
+
+
+def built_wheel(output_dir):
+    """A wheel, for this python, already built into one of pip's wheel cache directories"""
+    if not os.path.isdir(output_dir):
+        return None
+    for filename in sorted(os.listdir(output_dir)):
+        if filename.endswith('.whl') and not supported_tags().isdisjoint(parse_wheel_filename(filename)[2]):
+            return os.path.join(output_dir, filename)
+
+
+@contextmanager
+def pipfaster_build_cacher(index_url):
+    """Cache each wheel as soon as pip builds it: if the install fails later, the successful builds aren't lost.
+
+    Yields the [(index_url, wheel_path)] of the wheels this process built (and cached), as it builds them.
+
+    See: https://github.com/pypa/pip/issues/2140
+    """
+    from pip._internal.wheel import WheelBuilder
+    orig_build_one = WheelBuilder._build_one
+    built = []
+
+    def _build_one(self, req, output_dir, python_tag=None):
+        # only the wheels pip will keep; not e.g. those of local directories
+        if not output_dir.startswith(CACHE.pip_wheelhouse):
+            return orig_build_one(self, req, output_dir, python_tag=python_tag)
+
+        # pip's wheel cache is per link: another process may be building this very wheel
+        with cache_lock('build-' + os.path.relpath(output_dir, CACHE.pip_wheelhouse).replace(os.sep, '')):
+            wheel_path = built_wheel(output_dir)
+            if wheel_path is None:
+                wheel_path = orig_build_one(self, req, output_dir, python_tag=python_tag)
+                if wheel_path is not None:
+                    count_stat('builds')
+                    source_index_url = cache_wheel(req, wheel_path, index_url)
+                    if source_index_url is not None:
+                        built.append((source_index_url, wheel_path))
+            else:
+                logger.info('Faster! %s was built meanwhile, by another process.', req)
+                count_stat('builds_avoided')
+                cache_wheel(req, wheel_path, index_url)
+        return wheel_path
+
+    WheelBuilder._build_one = _build_one
+    try:
+        yield built
+    finally:
+        WheelBuilder._build_one = orig_build_one
+
+
+@contextmanager
+def pipfaster_recorded_digests():
+    """In hash-checking mode, check our cached wheels by the sha256 recorded as we cached them, not by rehashing.
+
+    A wheel that doesn't match is checked the usual way, so that pip reports the mismatch as usual.
+    """
+    from pip._internal.utils.hashes import Hashes
+    orig_check_against_path = Hashes.check_against_path
+
+    def check_against_path(self, path):
+        if cached_wheel_sha256(path) in self._allowed.get('sha256', ()):
+            return
+        return orig_check_against_path(self, path)
+
+    Hashes.check_against_path = check_against_path
+    try:
+        yield
+    finally:
+        Hashes.check_against_path = orig_check_against_path
+
+
+def wheel_tree(wheel_path):
+    """The unpacked contents of one of our cached wheels, unpacking it if need be. None for any other wheel.
+
+    It's found by the wheel's recorded sha256: a wheel that's changed since it was cached is installed as usual.
+    """
+    from pip._internal.utils.misc import unzip_file
+
+    recorded = recorded_in_sidecar(CACHE.wheel_digests, wheel_path)
+    if recorded is None:
+        return None
+    tree = os.path.join(CACHE.trees, recorded[0])
+    if not os.path.isdir(tree):
+        tree_tmp = '{}.{}'.format(tree, random.randint(0, sys.maxsize))
+        unzip_file(wheel_path, tree_tmp, flatten=False)
+        # the files will be shared by every virtualenv they're installed into
+        for dirpath, _, filenames in os.walk(tree_tmp):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                os.chmod(path, os.stat(path).st_mode & ~0o222)
+        try:
+            os.rename(tree_tmp, tree)
+        except OSError:  # another process unpacked it first
+            shutil.rmtree(tree_tmp)
+    return touch(tree)
+
+
+def wheel_members(wheel_path):
+    """The (relative) paths of the files in a wheel, read from its zip's central directory"""
+    import zipfile
+    with zipfile.ZipFile(wheel_path) as archive:
+        return [name.replace('/', os.sep) for name in archive.namelist() if not name.endswith('/')]
+
+
+def bytecode_path(source):
+    """Where this python writes the bytecode of a module, e.g. __pycache__/foo.cpython-36.pyc"""
+    try:
+        from importlib.util import cache_from_source
+    except ImportError:  # :pragma:nocover: py2
+        return source + ('c' if __debug__ else 'o')
+    return cache_from_source(source)
+
+
+def compiled_members(tree, members):
+    """The bytecode that this python compiled into a tree, for the modules among a wheel's members"""
+    result = []
+    for member in members:
+        if member.endswith('.py'):
+            compiled = os.path.relpath(bytecode_path(os.path.join(tree, member)), tree)
+            if compiled not in members and os.path.exists(os.path.join(tree, compiled)):
+                result.append(compiled)
+    return result
+
+
+def link_tree(tree, location, files):
+    """Hardlink (else copy) some files of a tree, by their relative paths, into location"""
+    for relpath in files:
+        dest = os.path.join(location, relpath)
+        mkdirp(os.path.dirname(dest))
+        try:
+            os.link(os.path.join(tree, relpath), dest)
+        except OSError:  # e.g. across filesystems
+            shutil.copy2(os.path.join(tree, relpath), dest)
+
+
+class _ModuleProxy(object):
+    """A stand-in for a module, with some of its functions replaced."""
+
+    def __init__(self, module, **replacements):
+        self.__module = module
+        self.__dict__.update(replacements)
+
+    def __getattr__(self, attr):
+        return getattr(self.__module, attr)
+
+
+class _HardlinkInstalls(object):
+    """pip's hooks, for pipfaster_hardlink_installs"""
+
+    def __init__(self, orig_unpack_file_url):
+        self.orig_unpack_file_url = orig_unpack_file_url
+        self.trees = {}  # build directory => the tree it was linked from
+        self.members = {}  # tree => the files of its wheel
+
+    def unpack_file_url(self, link, location, download_dir=None, hashes=None):
+        from pip._internal.download import url_to_path
+        wheel_path = url_to_path(link.url_without_fragment)
+        tree = None
+        if link.is_wheel and download_dir is None:
+            tree = wheel_tree(wheel_path)
+        if tree is None:
+            return self.orig_unpack_file_url(link, location, download_dir, hashes=hashes)
+
+        if hashes:
+            hashes.check_against_path(wheel_path)
+        # the tree also holds the bytecode compiled in it, by every python: only the wheel's own files are its
+        self.members[tree] = wheel_members(wheel_path)
+        link_tree(tree, location, self.members[tree])
+        self.trees[location.rstrip(os.path.sep) + os.path.sep] = tree
+
+    def linked_from(self, path):
+        """The tree, and path within it, that a path in one of the build directories was linked from"""
+        for location, tree in self.trees.items():
+            if path.startswith(location):
+                return tree, path[len(location):]
+        return None, None
+
+    def copyfile(self, src, dst):
+        tree, relpath = self.linked_from(src)
+        # the .data files (e.g. scripts) may be modified once installed: those are copied
+        if tree is not None and not relpath.split(os.path.sep, 1)[0].endswith('.data'):
+            try:
+                return os.link(os.path.join(tree, relpath), dst)
+            except OSError:  # e.g. across filesystems
+                pass
+        return shutil.copyfile(src, dst)
+
+    def compile_dir(self, dir, *args, **kwargs):
+        import compileall
+        tree, _ = self.linked_from(dir)
+        if tree is None:
+            return compileall.compile_dir(dir, *args, **kwargs)
+        # compile each tree just once, for each python
+        kwargs['force'] = False
+        result = compileall.compile_dir(tree, *args, **kwargs)
+        link_tree(tree, dir, compiled_members(tree, self.members[tree]))
+        return result
+
+
+@contextmanager
+def pipfaster_hardlink_installs():
+    """Install our cached wheels by hardlinking their pre-extracted files, rather than unzipping and copying them.
+
+    pip still does the rest of the install, so the RECORD and INSTALLER files (and so uninstall) are as usual.
+    """
+    import compileall
+    from pip._internal import download
+    from pip._internal import wheel
+
+    hooks = _HardlinkInstalls(download.unpack_file_url)
+    with patched(vars(download), {'unpack_file_url': hooks.unpack_file_url}):
+        with patched(vars(wheel), {
+                'shutil': _ModuleProxy(shutil, copyfile=hooks.copyfile),
+                'compileall': _ModuleProxy(compileall, compile_dir=hooks.compile_dir),
+        }):
+            yield
+
+
+# seconds to reuse an index page for without asking the index: by default, none, so that a new release is seen at once
+INDEX_CACHE_TTL = 0
+
+# the response headers we keep with an index page
+INDEX_PAGE_HEADERS = ('Content-Type', 'ETag', 'Last-Modified')
+
+
+def index_page_path(url):
+    from hashlib import sha256
+    return os.path.join(CACHE.index_pages, sha256(url.encode('UTF-8')).hexdigest() + '.json')
+
+
+def replace_userinfo(url, userinfo):
+    """url, with its user (and password) replaced, e.g. by '' to keep it out of the cache"""
+    from pip._vendor.six.moves.urllib.parse import urlsplit
+    from pip._vendor.six.moves.urllib.parse import urlunsplit
+    parts = urlsplit(url)
+    netloc = parts.netloc.rpartition('@')[2]
+    return urlunsplit(parts._replace(netloc=userinfo + '@' + netloc if userinfo else netloc))
+
+
+def store_index_page(url, page):
+    import time
+    dump_json(index_page_path(url), {
+        'url': replace_userinfo(page.url, ''),
+        'headers': {name: page.headers[name] for name in INDEX_PAGE_HEADERS if name in (page.headers or {})},
+        # the page's bytes, losslessly
+        'content': page.content.decode('latin-1'),
+        'fetched': time.time(),
+    })
+
+
+def cached_index_page(url, cached):
+    """An index page, as stored. Its links get the credentials of the url it was asked for, which we don't store."""
+    from pip._internal.index import HTMLPage
+    from pip._vendor.six.moves.urllib.parse import urlsplit
+    page_url = cached['url']
+    if urlsplit(page_url).hostname == urlsplit(url).hostname:
+        page_url = replace_userinfo(page_url, urlsplit(url).netloc.rpartition('@')[0])
+    return HTMLPage(cached['content'].encode('latin-1'), page_url, headers=cached['headers'])
+
+
+def index_page_is_fresh(cached, ttl):
+    import time
+    return bool(cached) and time.time() - cached['fetched'] < ttl
+
+
+def revalidate_index_page(session, url, cached):
+    """Ask the index whether our stored page is current, by its ETag or Last-Modified: if so, it's just a 304.
+
+    Returns the current page, stored anew. None if the index couldn't tell us: pip should ask it as usual.
+    """
+    import time
+    from pip._internal.index import HTMLPage
+    from pip._vendor.requests import RequestException
+
+    headers = cached.get('headers', {})
+    validators = {}
+    if 'ETag' in headers:
+        validators['If-None-Match'] = headers['ETag']
+    if 'Last-Modified' in headers:
+        validators['If-Modified-Since'] = headers['Last-Modified']
+    if not validators:
+        return None
+
+    validators.update({'Accept': 'text/html', 'Cache-Control': 'max-age=0'})
+    try:
+        response = session.get(url, headers=validators)
+    except RequestException as error:
+        logger.debug('Could not revalidate %s: %s', url, error)
+        return None
+
+    if response.status_code == 304:
+        count_stat('index_page_revalidations')
+        cached['fetched'] = time.time()
+        dump_json(index_page_path(url), cached)
+        return cached_index_page(url, cached)
+    elif response.ok and response.headers.get('Content-Type', '').startswith('text/html'):
+        page = HTMLPage(response.content, response.url, headers=response.headers)
+        store_index_page(url, page)
+        return page
+    return None
+
+
+@contextmanager
+def pipfaster_index_page_cache(ttl):
+    """Keep the index pages of unpinned requirements, and revalidate them (after ttl seconds, if any).
+
+    An unchanged page (by its ETag or Last-Modified) then costs just a 304 round trip.
+    """
+    from pip._internal.index import PackageFinder
+    orig_get_page = PackageFinder._get_page
+
+    def _get_page(self, link):
+        url = link.url_without_fragment
+        if not url.startswith(('http:', 'https:')):
+            return orig_get_page(self, link)
+
+        cached = load_json(index_page_path(url))
+        if index_page_is_fresh(cached, ttl):
+            count_stat('index_page_hits')
+            return cached_index_page(url, cached)
+
+        page = revalidate_index_page(self.session, url, cached) if cached else None
+        if page is None:
+            page = orig_get_page(self, link)
+            if page is not None:
+                store_index_page(url, page)
+        return page
+
+    PackageFinder._get_page = _get_page
+    try:
+        yield
+    finally:
+        PackageFinder._get_page = orig_get_page
+
+
+@contextmanager
+def pipfaster_offline(enabled):
+    """Resolve requirements from our wheelhouses alone, never touching the network.
+
+    Every requirement missing from them is listed, in one error, before anything is installed.
+    """
+    if not enabled:
+        yield
+        return
+
+    from pip._internal.exceptions import DistributionNotFound
+    from pip._internal.resolve import Resolver
+    FasterPackageFinder = faster_package_finder()
+    orig_find_requirement = FasterPackageFinder.find_requirement
+    orig_resolve, orig_resolve_one = Resolver.resolve, Resolver._resolve_one
+    missing = []
+
+    def find_requirement(self, req, upgrade):
+        return find_requirement_offline(self, req)
+
+    def _resolve_one(self, requirement_set, req_to_install, *args, **kwargs):
+        try:
+            return orig_resolve_one(self, requirement_set, req_to_install, *args, **kwargs)
+        except DistributionNotFound:
+            # carry on, to find any others that are missing
+            missing.append(str(req_to_install.req or req_to_install))
+            return []
+
+    def resolve(self, requirement_set):
+        result = orig_resolve(self, requirement_set)
+        if missing:
+            raise DistributionNotFound(
+                'Offline, and missing from the pip-faster cache: {}'.format(', '.join(sorted(set(missing)))),
+            )
+        return result
+
+    FasterPackageFinder.find_requirement = find_requirement
+    Resolver.resolve, Resolver._resolve_one = resolve, _resolve_one
+    try:
+        yield
+    finally:
+        FasterPackageFinder.find_requirement = orig_find_requirement
+        Resolver.resolve, Resolver._resolve_one = orig_resolve, orig_resolve_one
+
+
+def pip(args):
+    """Run pip, in-process."""
+    from pip._internal import main as pip_internal_main
+    info(colorize(('pip',) + args))
+
+    return pip_internal_main(list(args))
+
+
+def dist_to_req(dist):
+    """Make a pip.FrozenRequirement from a pkg_resources distribution object"""
+    try:  # :pragma:nocover: (pip>=10)
+        from pip._internal.operations.freeze import FrozenRequirement
+    except ImportError:  # :pragma:nocover: (pip<10)
+        from pip import FrozenRequirement
+
+    # normalize the casing, dashes in the req name
+    orig_name, dist.project_name = dist.project_name, dist.key
+    result = FrozenRequirement.from_dist(dist, [])
+    # put things back the way we found it.
+    dist.project_name = orig_name
+
+    return result
+
+
+def pip_get_installed():
+    """Code extracted from the middle of the pip freeze command.
+    FIXME: does not list anything installed via -e
+    """
+    from pip._internal.utils.misc import dist_is_local
+
+    return tuple(
+        dist_to_req(dist)
+        for dist in fresh_working_set()
+        if dist_is_local(dist)
+        if dist.key != 'python'  # See #220
+    )
+
+
+def fresh_working_set():
+    """return a pkg_resources "working set", representing the *currently* installed packages"""
+    pkg_resources = import_pkg_resources()
+
+    class WorkingSetPlusEditableInstalls(pkg_resources.WorkingSet):
+
+        def __init__(self, *args, **kwargs):
+            self._normalized_name_mapping = {}
+            super(WorkingSetPlusEditableInstalls, self).__init__(*args, **kwargs)
+
+        def add_entry(self, entry):
+            """Same as the original .add_entry, but sets only=False, so that egg-links are honored."""
+            logger.debug('working-set entry: %r', entry)
+            self.entry_keys.setdefault(entry, [])
+            self.entries.append(entry)
+            for dist in pkg_resources.find_distributions(entry, False):
+
+                # eggs override anything that's installed normally
+                # fun fact: pkg_resources.working_set's results depend on the
+                # ordering of os.listdir since the order of os.listdir is
+                # entirely arbitrary (an implemenation detail of file system),
+                # without calling site.main(), an .egg-link file may or may not
+                # be honored, depending on the filesystem
+                replace = (dist.precedence == pkg_resources.EGG_DIST)
+                self._normalized_name_mapping[normalize_name(dist.key)] = dist.key
+                self.add(dist, entry, False, replace=replace)
+
+        def find_normalized(self, req):
+            req = _package_req_to_pkg_resources_req(str(req))
+            req.key = self._normalized_name_mapping.get(normalize_name(req.key), req.key)
+            return self.find(req)
+
+    return WorkingSetPlusEditableInstalls()
+
+
+def req_cycle(req):
+    """is this requirement cyclic?"""
+    cls = req.__class__
+    seen = {req.name}
+    while isinstance(req.comes_from, cls):
+        req = req.comes_from
+        if req.name in seen:
+            return True
+        else:
+            seen.add(req.name)
+    return False
+
+
+def pretty_req(req):
+    """
+    return a copy of a pip requirement that is a bit more readable,
+    at the expense of removing some of its data
+    """
+    from copy import copy
+    req = copy(req)
+    req.link = None
+    req.satisfied_by = None
+    return req
+
+
+def _package_req_to_pkg_resources_req(req):
+    return import_pkg_resources().Requirement.parse(str(req))
+
+
+def trace_requirements(requirements):
+    """given an iterable of pip InstallRequirements,
+    return the set of required packages, given their transitive requirements.
+    """
+    from pip._internal.exceptions import InstallationError
+    from pip._internal.req import InstallRequirement
+    pkg_resources = import_pkg_resources()
+
+    requirements = tuple(pretty_req(r) for r in requirements)
+    working_set = fresh_working_set()
+
+    # breadth-first traversal:
+    from collections import deque
+    queue = deque(requirements)
+    queued = {_package_req_to_pkg_resources_req(req.req) for req in queue}
+    errors = []
+    result = []
+    while queue:
+        req = queue.popleft()
+
+        logger.debug('tracing: %s', req)
+        try:
+            dist = working_set.find_normalized(_package_req_to_pkg_resources_req(req.req))
+        except pkg_resources.VersionConflict as conflict:
+            dist = conflict.args[0]
+            errors.append('Error: version conflict: {} ({}) <-> {}'.format(
+                dist, timid_relpath(dist.location), req
+            ))
+
+        assert dist is not None, 'Should be unreachable in pip8+'
+        result.append(dist_to_req(dist))
+
+        # TODO: pip does no validation of extras. should we?
+        extras = [extra for extra in req.extras if extra in dist.extras]
+        for sub_req in sorted(dist.requires(extras=extras), key=lambda req: req.key):
+            sub_req = InstallRequirement(sub_req, req)
+
+            if req_cycle(sub_req):
+                logger.warning('Circular dependency! %s', sub_req)
+                continue
+            elif sub_req.req in queued:
+                logger.debug('already queued: %s', sub_req)
+                continue
+            else:
+                logger.debug('adding sub-requirement %s', sub_req)
+                queue.append(sub_req)
+                queued.add(sub_req.req)
+
+    if errors:
+        raise InstallationError('\n'.join(errors))
+
+    return result
+
+
+def reqnames(reqs):
+    return {req.name for req in reqs}
+
+
+def cache_gc_budget(options):
+    """The (max_size, max_age) of install's --cache-max-size and --cache-max-age, if either was given"""
+    from pip._internal.exceptions import CommandError
+
+    if options.cache_max_size is None and options.cache_max_age is None:
+        return None
+    try:
+        return (
+            None if options.cache_max_size is None else parse_size(options.cache_max_size),
+            None if options.cache_max_age is None else parse_age(options.cache_max_age),
+        )
+    except ValueError as error:
+        raise CommandError('Invalid cache budget: {}'.format(error))
+
+
+@memoized
+def faster_install_command():
+    from pip._internal.commands.install import InstallCommand
+
+    class FasterInstallCommand(InstallCommand):
+
+        def __init__(self, *args, **kw):
+            super(FasterInstallCommand, self).__init__(*args, **kw)
+
+            cmd_opts = self.cmd_opts
+            cmd_opts.add_option(
+                '--cache-max-size',
+                dest='cache_max_size',
+                metavar='size',
+                help='Afterward, evict the least-recently used wheels until the pip-faster cache is at most this size.',
+            )
+
+            cmd_opts.add_option(
+                '--cache-max-age',
+                dest='cache_max_age',
+                metavar='days',
+                help='Afterward, evict wheels not used in this many days from the pip-faster cache.',
+            )
+
+            cmd_opts.add_option(
+                '--offline',
+                action='store_true',
+                dest='offline',
+                default=False,
+                help=(
+                    'Install from the pip-faster cache alone, never touching the network, '
+                    'or list every requirement missing from it.'
+                ),
+            )
+
+            cmd_opts.add_option(
+                '--index-cache-ttl',
+                dest='index_cache_ttl',
+                metavar='seconds',
+                type='float',
+                default=INDEX_CACHE_TTL,
+                help=(
+                    'Reuse the index pages of unpinned requirements for this long, before revalidating them. '
+                    'Default: %default (always revalidate them)'
+                ),
+            )
+
+            cmd_opts.add_option(
+                '--hardlink-installs',
+                action='store_true',
+                dest='hardlink_installs',
+                default=False,
+                help=(
+                    'Install cached wheels by hardlinking their files, unpacked once, into site-packages. '
+                    'Those files are shared, read-only.'
+                ),
+            )
+
+            cmd_opts.add_option(
+                '--prune',
+                action='store_true',
+                dest='prune',
+                default=False,
+                help='Uninstall any non-required packages.',
+            )
+
+            cmd_opts.add_option(
+                '--no-prune',
+                action='store_false',
+                dest='prune',
+                help='Do not uninstall any non-required packages.',
+            )
+
+        def run(self, options, args):
+            """update install options with caching values"""
+            cache_budget = cache_gc_budget(options)
+            if options.prune:
+                previously_installed = pip_get_installed()
+
+            if options.offline:
+                options.disable_pip_version_check = True
+
+            index_urls = [options.index_url] + options.extra_index_urls
+            # With extra_index_urls, only the wheels whose source index we saw can be cached
+            default_index_url = None if options.extra_index_urls else options.index_url
+            with pipfaster_download_cacher(index_urls), pipfaster_recorded_digests():
+                with pipfaster_build_cacher(default_index_url) as built, pipfaster_index_page_cache(options.index_cache_ttl):
+                    with pipfaster_offline(options.offline):
+                        if options.hardlink_installs:
+                            with pipfaster_hardlink_installs():
+                                requirement_set = super(FasterInstallCommand, self).run(options, args)
+                        else:
+                            requirement_set = super(FasterInstallCommand, self).run(options, args)
+
+            if built and not options.offline:
+                with self._build_session(options) as session:
+                    upload_built_wheels(session, built)
+
+            required = requirement_set.requirements.values()
+
+            # e.g. wheels that pip had built already, in a previous run
+            cache_installed_wheels(default_index_url, requirement_set.successfully_downloaded)
+
+            if cache_budget:
+                removed, freed = cache_gc(*cache_budget)
+                logger.info('Removed %i files (%i bytes) from the pip-faster cache.', removed, freed)
+
+            if not options.ignore_dependencies:
+                # transitive requirements, previously installed, are also required
+                # this has a side-effect of finding any missing / conflicting requirements
+                required = trace_requirements(required)
+
+                if not options.prune:
+                    return requirement_set
+
+                extraneous = (
+                    reqnames(previously_installed) -
+                    reqnames(required) -
+                    # the stage1 bootstrap packages
+                    reqnames(trace_requirements([install_req_from_line('venv-update')])) -
+                    # See #186
+                    frozenset(('pkg-resources',))
+                )
+
+                if extraneous:
+                    extraneous = sorted(extraneous)
+                    pip(('uninstall', '--yes') + tuple(extraneous))
+
+    return FasterInstallCommand
+
+# TODO: a pip_faster.patch module
+
+
+def patch(attrs, updates):
+    """Perform a set of updates to a attribute dictionary, return the original values."""
+    orig = {}
+    for attr, value in updates:
+        orig[attr] = attrs[attr]
+        attrs[attr] = value
+    return orig
+
+
+@contextmanager
+def patched(attrs, updates):
+    """A context in which some attributes temporarily have a modified value."""
+    orig = patch(attrs, updates.items())
+    try:
+        yield orig
+    finally:
+        patch(attrs, orig.items())
+# END: pip_faster.patch module
+
+
+def pipfaster_install_prune_option():
+    from pip._internal.commands import commands_dict
+    FasterInstallCommand = faster_install_command()
+    return patched(commands_dict, {FasterInstallCommand.name: FasterInstallCommand})
+
+
+def pipfaster_packagefinder():
+    """Provide a short-circuited search when the requirement is pinned and appears on disk.
+
+    Suggested upstream at: https://github.com/pypa/pip/pull/2114
+    """
+    # A poor man's dependency injection: monkeypatch :(
+    try:  # :pragma:nocover: pip>=18.1
+        from pip._internal.cli import base_command
+    except ImportError:  # :pragma:nocover: pip<18.1
+        from pip._internal import basecommand as base_command
+    return patched(vars(base_command), {'PackageFinder': faster_package_finder()})
+
+
+def pipfaster_download_cacher(index_urls):
+    """vanilla pip stores a cache of the http session in its cache and not the
+    wheel files.  We intercept the download and save those files into our
+    cache
+    """
+    from pip._internal import download
+    orig = download._download_http_url
+    patched_fn = get_patched_download_http_url(orig, index_urls)
+    return patched(vars(download), {'_download_http_url': patched_fn})
+
+
+@contextmanager
+def pipfaster_shared_session():
+    """Share pip's index sessions (and their open connections) between the pip commands run in this process."""
+    try:  # :pragma:nocover: pip>=18.1
+        from pip._internal.cli.base_command import Command
+    except ImportError:  # :pragma:nocover: pip<18.1
+        from pip._internal.basecommand import Command
+
+    orig_build_session = Command._build_session
+    sessions = {}
+
+    def _build_session(self, options, retries=None, timeout=None):
+        key = (
+            options.cache_dir, retries, options.retries, timeout, options.timeout, tuple(options.trusted_hosts),
+            options.cert, options.client_cert, options.proxy, options.no_input,
+        )
+        if key not in sessions:
+            session = sessions[key] = orig_build_session(self, options, retries=retries, timeout=timeout)
+            # each command closes its session when it's done; we close them at the very end
+            session.close, session.close_shared = (lambda: None), session.close
+        return sessions[key]
+
+    Command._build_session = _build_session
+    try:
+        yield
+    finally:
+        Command._build_session = orig_build_session
+        for session in sessions.values():
+            session.close_shared()
+
+
+def parse_bootstrap_args(args):
+    """Split `bootstrap-deps= ... pip-command= ...` into the two groups of arguments"""
+    assert args[0] == 'bootstrap-deps=', args
+    split = args.index('pip-command=')
+    return tuple(args[1:split]), tuple(args[split + 1:])
+
+
+def pip_main(args):
+    """Run a pip command in-process, as if it were the only one.
+
+    pip leaves its (since deleted) $PIP_REQ_TRACKER directory in the environment, which breaks any later command.
+    """
+    from pip._internal import main as pip_internal_main
+    orig_environ = os.environ.copy()
+    try:
+        return pip_internal_main(list(args))
+    finally:
+        os.environ.clear()
+        os.environ.update(orig_environ)
+
+
+# the distributions this process has already imported, which an install can't replace in-process
+BOOTSTRAP_TOOLS = frozenset(('venv-update', 'pip', 'setuptools', 'wheel'))
+
+
+def bootstrap_tool_versions():
+    """The versions of our own tools, as currently installed (not as imported)."""
+    from pip._vendor.pkg_resources import WorkingSet
+    return {
+        normalize_name(dist.project_name): dist.version
+        for dist in WorkingSet()
+        if normalize_name(dist.project_name) in BOOTSTRAP_TOOLS
+    }
+
+
+def bootstrap_and_run(bootstrap_deps, args):
+    """Install venv-update's bootstrap dependencies then run pip-faster, sharing one process and its pip session.
+
+    If the bootstrap changed pip-faster or the tools under it (e.g. a pinned, older venv-update), the modules we've
+    imported are stale, so the new pip-faster runs in a process of its own.
+    """
+    with pipfaster_shared_session():
+        tools = bootstrap_tool_versions()
+        raise_on_failure(lambda: pip_main(('install',) + bootstrap_deps))
+        if bootstrap_tool_versions() != tools:
+            raise_on_failure(lambda: run(('pip-faster',) + args))
+            return
+        with pipfaster_install_prune_option():
+            with pipfaster_packagefinder():
+                raise_on_failure(lambda: pip_main(args))
+
+
+def pip_version():
+    """The same message as `pip --version`, without importing pip's internals."""
+    return 'pip {} from {} (python {}.{})'.format(
+        pipmodule.__version__, os.path.dirname(os.path.abspath(pipmodule.__file__)), *sys.version_info[:2]
+    )
+
+
+def main():
+    if sys.argv[1:] in (['--version'], ['-V']):
+        info(pip_version())
+        return
+    elif sys.argv[1:3] == ['cache', 'gc']:
+        return cache_gc_main(sys.argv[3:])
+    elif sys.argv[1:3] == ['cache', 'stats']:
+        return cache_stats_main(sys.argv[3:])
+    elif sys.argv[1:2] == ['bootstrap-deps=']:
+        # used by venv-update, once it has installed this pip-faster
+        return bootstrap_and_run(*parse_bootstrap_args(sys.argv[1:]))
+
+    from pip._internal import main as pip_internal_main
+    with pipfaster_install_prune_option():
+        with pipfaster_packagefinder():
+            raise_on_failure(pip_internal_main)
+
+
+if __name__ == '__main__':
+    exit(main())
@@ -0,0 +1,924 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+'''\
+usage: venv-update [-hV] [options]
+
+Update a (possibly non-existent) virtualenv directory using a pip requirements
+file.  When this script completes, the virtualenv directory should contain the
+same packages as if it were deleted then rebuilt.
+
+venv-update uses "trailing equal" options (e.g. venv=) to delimit groups of
+(conventional, dashed) options to pass to wrapped commands (virtualenv and pip).
+
+Options:
+    venv=             parameters are passed to virtualenv
+                       default: {venv=}
+    install=          options to pip-command
+                       default: {install=}
+    pip-command=      is run after the virtualenv directory is bootstrapped
+                       default: {pip-command=}
+    bootstrap-deps=   dependencies to install before pip-command= is run
+                       default: {bootstrap-deps=}
+
+Examples:
+    # install requirements.txt to "venv"
+    venv-update
+
+    # install requirements.txt to "myenv"
+    venv-update venv= myenv
+
+    # install requirements.txt to "myenv" using Python 3.4
+    venv-update venv= -ppython3.4 myenv
+
+    # install myreqs.txt to "venv"
+    venv-update install= -r myreqs.txt
+
+    # install requirements.txt to "venv", verbosely
+    venv-update venv= venv -vvv install= -r requirements.txt -vvv
+
+    # install requirements.txt to "venv", without pip-faster --update --prune
+    venv-update pip-command= pip install
+
+We strongly recommend that you keep the default value of pip-command= in order
+to quickly and reproducibly install your requirements. You can override the
+packages installed during bootstrapping, prior to pip-command=, by setting
+bootstrap-deps=
+
+Pip options are also controllable via environment variables.
+See https://pip.readthedocs.org/en/stable/user_guide/#environment-variables
+For example:
+    PIP_INDEX_URL=https://pypi.example.com/simple venv-update
+
+Please send issues to: https://github.com/yelp/venv-update
+'''
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import os
+from os.path import exists
+from os.path import join
+from subprocess import CalledProcessError
+
+# https://github.com/Yelp/venv-update/issues/227
+# https://stackoverflow.com/a/53193892
+# On OS X, Python "framework" builds set a `__PYVENV_LAUNCHER__` environment
+# variable when executed, which gets inherited by child processes and cause
+# certain Python builds to put incorrect packages onto their path. This causes
+# weird bugs with venv-update like import errors calling pip and infinite
+# exec() loops trying to activate a virtualenv.
+#
+# To fix this we just delete the environment variable.
+os.environ.pop('__PYVENV_LAUNCHER__', None)
+
+__version__ = '4.0.0'
+DEFAULT_VIRTUALENV_PATH = 'venv'
+DEFAULT_OPTION_VALUES = {
+    'venv=': (DEFAULT_VIRTUALENV_PATH,),
+    'install=': ('-r', 'requirements.txt',),
+    'pip-command=': ('pip-faster', 'install', '--upgrade', '--prune'),
+    'bootstrap-deps=': ('venv-update==' + __version__,),
+}
+__doc__ = __doc__.format(
+    **{key: ' '.join(val) for key, val in DEFAULT_OPTION_VALUES.items()}
+)
+
+# This script must not rely on anything other than
+#   stdlib>=2.6 and virtualenv>1.11
+
+
+def parseargs(argv):
+    '''handle --help, --version and our double-equal ==options'''
+    args = []
+    options = {}
+    key = None
+    for arg in argv:
+        if arg in DEFAULT_OPTION_VALUES:
+            key = arg.strip('=').replace('-', '_')
+            options[key] = ()
+        elif key is None:
+            args.append(arg)
+        else:
+            options[key] += (arg,)
+
+    if set(args) & {'-h', '--help'}:
+        print(__doc__, end='')
+        exit(0)
+    elif set(args) & {'-V', '--version'}:
+        print(__version__)
+        exit(0)
+    elif args:
+        exit('invalid option: %s\nTry --help for more information.' % args[0])
+
+    return options
+
+
+def timid_relpath(arg):
+    """convert an argument to a relative path, carefully"""
+    # TODO-TEST: unit tests
+    from os.path import isabs, relpath, sep
+    if isabs(arg):
+        result = relpath(arg)
+        if result.count(sep) + 1 < arg.count(sep):
+            return result
+
+    return arg
+
+
+def shellescape(args):
+    from pipes import quote
+    return ' '.join(quote(timid_relpath(arg)) for arg in args)
+
+
+def colorize(cmd):
+    from os import isatty
+
+    if isatty(1):
+        template = '\033[36m>\033[m \033[32m{0}\033[m'
+    else:
+        template = '> {0}'
+
+    return template.format(shellescape(cmd))
+
+
+def run(cmd):
+    from subprocess import check_call
+    info(colorize(cmd))
+    check_call(cmd)
+
+
+def info(msg):
+    # flush every line, so that our output is correctly interleaved with any subprocess output.
+    from sys import stdout
+    msg += '\n'
+    if str is bytes:  # :pragma:nocover: py2
+        msg = msg.encode('UTF-8')
+    stdout.write(msg)
+    stdout.flush()
+
+
+def check_output(cmd):
+    from subprocess import Popen, PIPE
+    process = Popen(cmd, stdout=PIPE)
+    output, _ = process.communicate()
+    if process.returncode:
+        raise CalledProcessError(process.returncode, cmd)
+    else:
+        assert process.returncode == 0
+        return output.decode('UTF-8')
+
+
+def samefile(file1, file2):
+    if not exists(file1) or not exists(file2):
+        return False
+    else:
+        from os.path import samefile
+        return samefile(file1, file2)
+
+
+def exec_(argv):  # never returns
+    """Wrapper to os.execv which shows the command and runs any atexit handlers (for coverage's sake).
+    Like os.execv, this function never returns.
+    """
+    # info('EXEC' + colorize(argv))  # TODO: debug logging by environment variable
+
+    # in python3, sys.exitfunc has gone away, and atexit._run_exitfuncs seems to be the only pubic-ish interface
+    #   https://hg.python.org/cpython/file/3.4/Modules/atexitmodule.c#l289
+    import atexit
+    atexit._run_exitfuncs()
+
+    from os import execv
+    execv(argv[0], argv)
+
+
+class Scratch(object):
+
+    def __init__(self):
+        self.dir = join(user_cache_dir(), 'venv-update', __version__)
+        self.venv = join(self.dir, 'venv')
+        self.python = venv_python(self.venv)
+        self.src = join(self.dir, 'src')
+        self.interpreters = join(self.dir, 'interpreters.json')
+
+
+def exec_scratch_virtualenv(args):
+    """
+    goals:
+        - get any random site-packages off of the pythonpath
+        - ensure we can import virtualenv
+        - ensure that we're not using the interpreter that we may need to delete
+        - idempotency: do nothing if the above goals are already met
+    """
+    scratch = Scratch()
+    if not exists(scratch.python):
+        run(('virtualenv', scratch.venv))
+
+    if not exists(join(scratch.src, 'virtualenv')):
+        scratch_python = venv_python(scratch.venv)
+        # TODO: do we allow user-defined override of which version of virtualenv to install?
+        tmp = scratch.src + '.tmp'
+        run((scratch_python, '-m', 'pip.__main__', 'install', 'virtualenv>=20.0.8', '--target', tmp))
+        from os import rename
+        rename(tmp, scratch.src)
+
+    import sys
+    from os.path import realpath
+    # We want to compare the paths themselves as sometimes sys.path is the same
+    # as scratch.venv, but with a suffix of bin/..
+    if realpath(sys.prefix) != realpath(scratch.venv):
+        # TODO-TEST: sometimes we would get a stale version of venv-update
+        exec_((scratch.python, dotpy(__file__)) + args)  # never returns
+
+    # TODO-TEST: the original venv-update's directory was on sys.path (when using symlinking)
+    sys.path[0] = scratch.src
+
+
+def _activate_origin(activate):
+    """The $VIRTUAL_ENV recorded by bin/activate"""
+    import io
+    import re
+    with io.open(activate, encoding='UTF-8', errors='replace') as activate_file:
+        match = re.search(
+            r'''^VIRTUAL_ENV=(?:'([^']*)'|"([^"$`\\]*)"|([^'"$`\\\s]+))\s*$''',
+            activate_file.read(),
+            re.MULTILINE,
+        )
+    if match:
+        return next(group for group in match.groups() if group is not None)
+
+
+def _pyvenv_cfg_origin(venv_path):
+    """The destination recorded by `python -m venv` (3.11+) in pyvenv.cfg"""
+    import io
+    pyvenv_cfg = join(venv_path, 'pyvenv.cfg')
+    if not exists(pyvenv_cfg):
+        return None
+    with io.open(pyvenv_cfg, encoding='UTF-8', errors='replace') as pyvenv_cfg_file:
+        for line in pyvenv_cfg_file:
+            key, _, value = line.partition('=')
+            if key.strip() == 'command' and value.split():
+                return value.split()[-1]
+
+
+def _shebang_origin(venv_path, sample=5):
+    """The virtualenv named by the shebang of (a sample of) its scripts"""
+    from os import listdir
+    from os.path import basename, dirname, isfile
+    bin_dir = join(venv_path, 'bin')
+    scripts = [
+        join(bin_dir, script) for script in sorted(listdir(bin_dir))
+        if not script.startswith(('python', 'activate'))
+    ]
+    for script in [script for script in scripts if isfile(script)][:sample]:
+        with open(script, 'rb') as script_file:
+            shebang = script_file.readline().decode('UTF-8', 'replace')
+        if shebang.startswith('#!') and shebang[2:].split():
+            interpreter = shebang[2:].split()[0]
+            if basename(interpreter).startswith(('python', 'pypy')) and basename(dirname(interpreter)) == 'bin':
+                return dirname(dirname(interpreter))
+
+
+def get_original_path(venv_path):
+    """This helps us know whether someone has tried to relocate the virtualenv
+
+    We read the location recorded in bin/activate, rather than sourcing it in a shell. Virtualenvs that don't record it
+    there fall back to pyvenv.cfg, then script shebangs. Returns None if there's no bin/activate.
+    """
+    activate = venv_executable(venv_path, 'activate')
+    if not exists(activate):
+        return None
+    return _activate_origin(activate) or _pyvenv_cfg_origin(venv_path) or _shebang_origin(venv_path)
+
+
+INTERPRETER_INFO_SCRIPT = '''\
+import json, os, platform, sys, sysconfig
+print(json.dumps({
+    "executable": os.path.realpath(sys.executable),
+    "version": ".".join(str(p) for p in sys.version_info),
+    "implementation": platform.python_implementation(),
+    "abi": sysconfig.get_config_var("SOABI") or getattr(sys, "abiflags", ""),
+    "base_prefix": getattr(sys, "real_prefix", getattr(sys, "base_prefix", sys.prefix)),
+}))
+'''
+
+
+def load_json(path):
+    import json
+    try:
+        with open(path) as json_file:
+            return json.load(json_file)
+    except (IOError, ValueError):  # missing, or half-written by an older venv-update
+        return {}
+
+
+def dump_json(path, value):
+    """atomically (over)write a json file"""
+    import json
+    from os import getpid, rename
+    from os.path import dirname
+    if not exists(dirname(path)):
+        os.makedirs(dirname(path))
+    tmp = '%s.%i' % (path, getpid())
+    with open(tmp, 'w') as json_file:
+        json.dump(value, json_file, indent=1, sort_keys=True)
+    rename(tmp, path)
+
+
+def interpreter_info(interpreter):
+    """Facts about a python interpreter: version, implementation, abi, and base_prefix.
+
+    These are cached by the identity of the interpreter binary, so that we don't need to start an interpreter to
+    validate a virtualenv. A changed binary gets a new realpath, inode, size or mtime, and is inspected again.
+    Launchers, such as pyenv shims, run some other binary which they may change at any time; they aren't cached.
+    """
+    if not exists(interpreter):
+        return None
+
+    from os import stat
+    from os.path import realpath
+    path = realpath(interpreter)
+    binary = stat(path)
+    identity = [binary.st_ino, binary.st_size, binary.st_mtime]
+
+    cache_path = Scratch().interpreters
+    cache = load_json(cache_path)
+    cached = cache.get(path)
+    if cached is not None and cached['identity'] == identity:
+        return cached['info']
+
+    import json
+    result = json.loads(check_output((interpreter, '-c', INTERPRETER_INFO_SCRIPT)))
+    if result.get('executable') != path:
+        return result
+
+    cache = load_json(cache_path)  # in case another process updated it meanwhile
+    cache[path] = {'identity': identity, 'info': result}
+    dump_json(cache_path, cache)
+    return result
+
+
+def get_python_version(interpreter):
+    facts = interpreter_info(interpreter)
+    if facts is None:
+        return None
+    else:
+        return facts['version']
+
+
+def invalid_virtualenv_reason(venv_path, source_python, destination_python, virtualenv_system_site_packages):
+    orig_path = get_original_path(venv_path)
+    if orig_path is None:
+        return 'could not inspect metadata'
+    if not samefile(orig_path, venv_path):
+        return 'virtualenv moved {} -> {}'.format(timid_relpath(orig_path), timid_relpath(venv_path))
+
+    pyvenv_cfg_path = join(venv_path, 'pyvenv.cfg')
+
+    if not exists(pyvenv_cfg_path):
+        return 'virtualenv created with virtualenv<20'
+
+    # Avoid using pathlib.Path which doesn't exist in python2 and
+    # hack around configparser's inability to handle sectionless config
+    # files: https://bugs.python.org/issue22253
+    from configparser import ConfigParser
+    pyvenv_cfg = ConfigParser()
+    with open(pyvenv_cfg_path, 'r') as f:
+        pyvenv_cfg.read_string('[root]\n' + f.read())
+    if pyvenv_cfg.getboolean('root', 'include-system-site-packages', fallback=False) != virtualenv_system_site_packages:
+        return 'system-site-packages changed, to %s' % virtualenv_system_site_packages
+    if source_python is None:
+        return
+
+    destination_version = pyvenv_cfg.get('root', 'version_info', fallback=None)
+    source_version = get_python_version(source_python)
+    if source_version != destination_version:
+        return 'python version changed {} -> {}'.format(destination_version, source_version)
+
+    base_executable = pyvenv_cfg.get('root', 'base-executable', fallback=None)
+    base_executable_version = get_python_version(base_executable)
+    if base_executable_version != destination_version:
+        return 'base executable python version changed {} -> {}'.format(destination_version, base_executable_version)
+
+
+def python_option(args):
+    """The value of virtualenv's -p/--python option, if any."""
+    result = None
+    args = iter(args)
+    for arg in args:
+        if arg in ('-p', '--python'):
+            result = next(args, None)
+        elif arg.startswith('--python='):
+            result = arg[len('--python='):]
+        elif arg.startswith('-p'):
+            result = arg[2:]
+    return result
+
+
+def virtualenv_configured_externally():
+    """Is virtualenv configured by environment variables or a config file, rather than just its arguments?"""
+    from os import environ
+    from os.path import expanduser
+    if any(var.startswith('VIRTUALENV_') for var in environ):
+        return True
+    config_dirs = (
+        environ.get('XDG_CONFIG_HOME', expanduser('~/.config')),
+        expanduser('~/Library/Application Support'),  # OS X
+    )
+    return any(exists(join(config_dir, 'virtualenv', 'virtualenv.ini')) for config_dir in config_dirs)
+
+
+class VirtualenvArgs(object):
+    """Answers our questions about some virtualenv arguments.
+
+    Asking virtualenv itself means importing it and doing interpreter discovery, so we only do that when the
+    arguments alone aren't enough, and then at most once.
+    """
+
+    def __init__(self, args):
+        self.args = args
+        self._session = None
+        # argparse allows abbreviated options, which we don't attempt to interpret
+        abbreviated = any(
+            arg.split('=', 1)[0] not in ('--python', '--system-site-packages')
+            for arg in args if arg.startswith(('--py', '--sys'))
+        )
+        self.simple = not abbreviated and not virtualenv_configured_externally()
+
+    @property
+    def session(self):
+        if self._session is None:
+            import virtualenv
+            self._session = virtualenv.session_via_cli(self.args)
+        return self._session
+
+    def source_python(self):
+        """the interpreter we're instructing virtualenv to copy"""
+        python = python_option(self.args)
+        if python is None:
+            return None
+        elif self.simple and '/' in python and exists(python):
+            return python
+        else:
+            # a bare name (e.g. python3) is a spec: virtualenv prefers the running interpreter, if it satisfies it
+            return self.session._interpreter.executable
+
+    def system_site_packages(self):
+        if self.simple:
+            return '--system-site-packages' in self.args
+        else:
+            return self.session.creator.enable_system_site_package
+
+
+def ensure_virtualenv(args, return_values):
+    """Ensure we have a valid virtualenv."""
+
+    from sys import argv
+    argv[:] = ('virtualenv',) + args
+    info(colorize(argv))
+
+    run_virtualenv = True
+    filtered_args = [a for a in args if not a.startswith('-')]
+    if filtered_args:
+        venv_path = return_values.venv_path = filtered_args[0] if filtered_args else None
+        if venv_path == DEFAULT_VIRTUALENV_PATH:
+            from os.path import abspath, basename, dirname
+            args = ('--prompt=({})'.format(basename(dirname(abspath(venv_path)))),) + args
+
+        # Validate existing virtualenv if there is one
+        # there are two python interpreters involved here:
+        # 1) the interpreter we're instructing virtualenv to copy
+        # 2) the interpreter virtualenv will create
+        destination_python = venv_python(venv_path)
+
+        if exists(destination_python):
+            virtualenv_args = VirtualenvArgs(args)
+            reason = invalid_virtualenv_reason(
+                venv_path,
+                virtualenv_args.source_python(),
+                destination_python,
+                virtualenv_args.system_site_packages(),
+            )
+            if reason:
+                info('Removing invalidated virtualenv. (%s)' % reason)
+                run(('rm', '-rf', venv_path))
+            else:
+                info('Keeping valid virtualenv from previous run.')
+                run_virtualenv = False  # looks good! we're done here.
+
+    if run_virtualenv:
+        import virtualenv
+        raise_on_failure(lambda: virtualenv.cli_run(args), ignore_return=True)
+
+    # There might not be a venv_path if doing something like "venv= --version"
+    # and not actually asking virtualenv to make a venv.
+    if return_values.venv_path is not None:
+        run(('rm', '-rf', join(return_values.venv_path, 'local')))
+
+
+REQUIREMENT_FILE_OPTIONS = ('-r', '--requirement', '-c', '--constraint')
+EDITABLE_OPTIONS = ('-e', '--editable')
+# pip options whose (separate) value is not a requirement
+VALUE_OPTIONS = frozenset((
+    '-i', '--index-url', '--extra-index-url', '-f', '--find-links', '--trusted-host',
+    '--cert', '--client-cert', '--proxy', '--src', '-t', '--target', '--prefix', '--root',
+    '--cache-dir', '--log', '-b', '--build', '--upgrade-strategy', '--no-binary', '--only-binary',
+    '--global-option', '--install-option', '--hash', '--platform', '--python-version',
+    '--implementation', '--abi', '--progress-bar', '--timeout', '--retries', '--exists-action',
+))
+
+
+def _option_value(arg, options):
+    """Return (option, value) when arg is one of options, with or without an attached value."""
+    for option in options:
+        if arg == option:
+            return option, None
+        elif option.startswith('--') and arg.startswith(option + '='):
+            return option, arg[len(option) + 1:]
+        elif not option.startswith('--') and arg.startswith(option):
+            return option, arg[len(option):]
+    return None, None
+
+
+def _is_local_or_url(arg):
+    return '://' in arg or arg.startswith(('.', '/', '~', 'file:'))
+
+
+def _requirement_file_args(filename):
+    """The (whitespace-separated) arguments in a requirements file"""
+    import io
+    result = []
+    with io.open(filename, encoding='UTF-8', errors='replace') as requirements:
+        for line in requirements:
+            line = line.split(' #', 1)[0].strip()
+            if line and not line.startswith('#'):
+                result.extend(line.split())
+    return result
+
+
+def requirement_files(args, relative_to='', result=None):
+    """List the requirement and constraint files named by some pip arguments, following nested includes.
+
+    Returns None if any requirement can't be fingerprinted by content alone: editables, local paths and urls.
+    """
+    from os.path import dirname, normpath
+    if result is None:
+        result = []
+    args = iter(args)
+    for arg in args:
+        if _option_value(arg, EDITABLE_OPTIONS)[0]:
+            return None
+        option, value = _option_value(arg, REQUIREMENT_FILE_OPTIONS)
+        if option is None:
+            if arg in VALUE_OPTIONS:
+                next(args, None)
+            elif _is_local_or_url(arg):
+                return None
+            continue
+        if value is None:
+            value = next(args, None)
+            if value is None:  # a trailing -r, naming no file: pip will refuse it
+                return None
+        if '://' in value:
+            return None
+
+        filename = normpath(join(relative_to, value))
+        if filename in result:
+            continue  # already seen; includes may be circular
+        result.append(filename)
+        if not exists(filename) or requirement_files(_requirement_file_args(filename), dirname(filename), result) is None:
+            return None
+    return result
+
+
+def fingerprint_path(venv_path):
+    return join(venv_path, 'venv-update.fingerprint')
+
+
+def venv_fingerprint(venv_path, install, pip_command, bootstrap_deps, environ):
+    """A digest of everything that determines the result of the install phase.
+
+    Returns None if we can't tell whether the install would be a no-op.
+    """
+    files = requirement_files(install + bootstrap_deps)
+    if files is None:
+        return None
+
+    from glob import glob
+    from hashlib import sha256
+    from os import stat
+    from os.path import realpath
+    digest = sha256()
+
+    def update(*parts):
+        digest.update(repr(parts).encode('UTF-8'))
+
+    update(__version__, install, pip_command, bootstrap_deps)
+    update(*sorted((key, value) for key, value in environ.items() if key.startswith('PIP_')))
+    for filename in files:
+        update(realpath(filename))
+        with open(filename, 'rb') as requirements:
+            digest.update(requirements.read())
+
+    # the interpreter identity
+    pyvenv_cfg_path = join(venv_path, 'pyvenv.cfg')
+    if exists(pyvenv_cfg_path):
+        with open(pyvenv_cfg_path, 'rb') as pyvenv_cfg:
+            digest.update(pyvenv_cfg.read())
+    python = realpath(venv_python(venv_path))
+    python_stat = stat(python)
+    update(python, python_stat.st_ino, python_stat.st_size, python_stat.st_mtime)
+
+    # any install or uninstall since our last run changes the site-packages listing
+    for site_packages in sorted(glob(join(venv_path, 'lib', '*', 'site-packages'))):
+        update(site_packages, stat(site_packages).st_mtime)
+
+    return digest.hexdigest()
+
+
+def read_fingerprint(venv_path):
+    try:
+        with open(fingerprint_path(venv_path)) as fingerprint:
+            return fingerprint.read().strip()
+    except IOError:
+        return None
+
+
+def write_fingerprint(venv_path, fingerprint):
+    path = fingerprint_path(venv_path)
+    if fingerprint is None:
+        if exists(path):
+            os.remove(path)
+    else:
+        with open(path, 'w') as fingerprint_file:
+            fingerprint_file.write(fingerprint + '\n')
+
+
+def wait_for_all_subprocesses():
+    from os import wait
+    try:
+        while True:
+            wait()
+    except OSError as error:
+        if error.errno == 10:  # no child processes
+            return
+        else:
+            raise
+
+
+def touch(filename, timestamp):
+    """set the mtime of a file"""
+    if timestamp is not None:
+        timestamp = (timestamp, timestamp)  # atime, mtime
+
+    from os import utime
+    utime(filename, timestamp)
+
+
+def mark_venv_valid(venv_path):
+    wait_for_all_subprocesses()
+    touch(venv_path, None)
+
+
+def mark_venv_invalid(venv_path):
+    # LBYL, to attempt to avoid any exception during exception handling
+    from os.path import isdir
+    if venv_path and isdir(venv_path):
+        info('')
+        info("Something went wrong! Sending '%s' back in time, so make knows it's invalid." % timid_relpath(venv_path))
+        wait_for_all_subprocesses()
+        touch(venv_path, 0)
+
+
+def dotpy(filename):
+    if filename.endswith(('.pyc', '.pyo', '.pyd')):
+        return filename[:-1]
+    else:
+        return filename
+
+
+def venv_executable(venv_path, executable):
+    return join(venv_path, 'bin', executable)
+
+
+def venv_python(venv_path):
+    return venv_executable(venv_path, 'python')
+
+
+def user_cache_dir():
+    # stolen from pip.utils.appdirs.user_cache_dir
+    from os import getenv
+    from os.path import expanduser
+    return getenv('XDG_CACHE_HOME', expanduser('~/.cache'))
+
+
+def venv_update(
+        venv=DEFAULT_OPTION_VALUES['venv='],
+        install=DEFAULT_OPTION_VALUES['install='],
+        pip_command=DEFAULT_OPTION_VALUES['pip-command='],
+        bootstrap_deps=DEFAULT_OPTION_VALUES['bootstrap-deps='],
+):
+    """we have an arbitrary python interpreter active, (possibly) outside the virtualenv we want.
+
+    make a fresh venv at the right spot, make sure it has pip-faster, and use it
+    """
+
+    # SMELL: mutable argument as return value
+    class return_values(object):
+        venv_path = None
+
+    # pip_faster modifies the environment; fingerprint what the user gave us
+    environ = dict(os.environ)
+
+    try:
+        ensure_virtualenv(venv, return_values)
+        if return_values.venv_path is None:
+            return
+        # invariant: the final virtualenv exists, with the right python version
+        venv_path = return_values.venv_path
+        fingerprint = venv_fingerprint(venv_path, install, pip_command, bootstrap_deps, environ)
+        if fingerprint is not None and fingerprint == read_fingerprint(venv_path):
+            info('Requirements unchanged since previous run; skipping install.')
+        else:
+            write_fingerprint(venv_path, None)
+            raise_on_failure(lambda: pip_faster(venv_path, pip_command, install, bootstrap_deps))
+            # the install itself changes site-packages, so we fingerprint its result
+            write_fingerprint(venv_path, venv_fingerprint(venv_path, install, pip_command, bootstrap_deps, environ))
+    except BaseException:
+        mark_venv_invalid(return_values.venv_path)
+        raise
+    else:
+        mark_venv_valid(return_values.venv_path)
+
+
+def execfile_(filename):
+    with open(filename) as code:
+        code = compile(code.read(), filename, 'exec')
+        exec(code, {'__file__': filename})
+
+
+def pip_faster(venv_path, pip_command, install, bootstrap_deps):
+    """install and run pip-faster"""
+    # activate the virtualenv
+    execfile_(venv_executable(venv_path, 'activate_this.py'))
+
+    # disable a useless warning
+    # FIXME: ensure a "true SSLContext" is available
+    from os import environ
+    environ['PIP_DISABLE_PIP_VERSION_CHECK'] = '1'
+
+    # the presence of an executable doesn't imply the right version, so we
+    # check the installed metadata, and leave anything non-trivial to pip.
+    if bootstrap_satisfied(venv_path, bootstrap_deps):
+        info('Bootstrap requirements already satisfied: %s' % shellescape(bootstrap_deps))
+    elif pip_command[:1] == ('pip-faster',) and bootstrap_satisfied(venv_path, DEFAULT_OPTION_VALUES['bootstrap-deps=']):
+        # our pip-faster is already installed: bootstrap and install in a single process,
+        # unless the bootstrap replaces pip-faster or its tools, in which case it hands the install over to the new one
+        run(('pip-faster', 'bootstrap-deps=') + bootstrap_deps + ('pip-command=',) + pip_command[1:] + install)
+        return
+    else:
+        run(('pip', 'install') + bootstrap_deps)
+
+    run(pip_command + install)
+
+
+def normalize_name(name):
+    """Normalize a python package name a la PEP 503"""
+    # https://www.python.org/dev/peps/pep-0503/#normalized-names
+    import re
+    return re.sub('[-_.]+', '-', name).lower()
+
+
+def simple_version(version):
+    """A comparable form of a dotted-numeric version, or None for anything fancier."""
+    parts = version.strip().split('.')
+    if not all(part.isdigit() for part in parts):
+        return None
+    parts = [int(part) for part in parts]
+    while len(parts) > 1 and parts[-1] == 0:
+        parts.pop()
+    return tuple(parts)
+
+
+def version_satisfies(version, specifiers):
+    """Does a version satisfy some comma-separated specifiers? None if we can't tell."""
+    import operator
+    import re
+    operators = {
+        '==': operator.eq, '!=': operator.ne,
+        '<=': operator.le, '>=': operator.ge,
+        '<': operator.lt, '>': operator.gt,
+    }
+    version = simple_version(version)
+    if version is None:
+        return None
+    for specifier in specifiers.split(','):
+        if not specifier.strip():
+            continue
+        match = re.match(r'^\s*(==|!=|<=|>=|<|>)\s*([0-9.]+)\s*$', specifier)
+        if match is None:
+            return None
+        op, other = match.groups()
+        other = simple_version(other)
+        if other is None:
+            return None
+        if not operators[op](version, other):
+            return False
+    return True
+
+
+def installed_distributions(venv_path):
+    """Map each (normalized) distribution name installed in a virtualenv to its version and metadata file."""
+    from glob import glob
+    from os.path import basename
+    result = {}
+    for site_packages in glob(join(venv_path, 'lib', '*', 'site-packages')):
+        for metadata in glob(join(site_packages, '*.dist-info', 'METADATA')):
+            distribution = basename(metadata[:-len('.dist-info/METADATA')])
+            name, _, version = distribution.partition('-')
+            result[normalize_name(name)] = (version, metadata)
+    return result
+
+
+def _requires_dist(metadata):
+    """The Requires-Dist of some METADATA, as (name, specifiers) pairs. None if we can't interpret them."""
+    import re
+    result = []
+    with open(metadata, 'rb') as metadata_file:
+        for line in metadata_file:
+            line = line.decode('UTF-8', 'replace').rstrip()
+            if not line:
+                break  # the end of the headers
+            elif not line.startswith('Requires-Dist:'):
+                continue
+            requirement, _, marker = line[len('Requires-Dist:'):].partition(';')
+            if marker.strip():
+                if re.search(r'\bextra\s*==', marker) and ' or ' not in marker:
+                    continue  # we don't bootstrap extras
+                return None
+            match = re.match(r'^\s*([A-Za-z0-9][A-Za-z0-9._-]*)\s*\(?([^()\[]*)\)?\s*$', requirement)
+            if match is None:
+                return None
+            result.append(match.groups())
+    return result
+
+
+def bootstrap_satisfied(venv_path, bootstrap_deps):
+    """Are these bootstrap requirements already installed, along with their dependencies?
+
+    We only handle simple name==version pins. Anything else (urls, editables, ranges, options) is left to pip.
+    """
+    import re
+    installed = installed_distributions(venv_path)
+    todo = []
+    for dep in bootstrap_deps:
+        match = re.match(r'^([A-Za-z0-9][A-Za-z0-9._-]*)(==[0-9.]+)$', dep)
+        if match is None:
+            return False
+        todo.append(match.groups())
+
+    seen = set()
+    while todo:
+        name, specifiers = todo.pop()
+        name = normalize_name(name)
+        if name not in installed:
+            return False
+        version, metadata = installed[name]
+        if not version_satisfies(version, specifiers):
+            return False
+        if name in seen:
+            continue
+        seen.add(name)
+        requires = _requires_dist(metadata)
+        if requires is None:
+            return False
+        todo.extend(requires)
+    return True
+
+
+def raise_on_failure(mainfunc, ignore_return=False):
+    """raise if and only if mainfunc fails"""
+    try:
+        errors = mainfunc()
+        if not ignore_return and errors:
+            exit(errors)
+    except CalledProcessError as error:
+        exit(error.returncode)
+    except SystemExit as error:
+        if error.code:
+            raise
+    except KeyboardInterrupt:  # I don't plan to test-cover this.  :pragma:nocover:
+        exit(1)
+
+
+def main():
+    from sys import argv
+    args = tuple(argv[1:])
+
+    # process --help before we create any side-effects.
+    options = parseargs(args)
+    exec_scratch_virtualenv(args)
+    return venv_update(**options)
+
+
+if __name__ == '__main__':
+    exit(main())
@@ -9,11 +9,15 @@ import sys
 import time
 from contextlib import contextmanager
 from errno import ECONNREFUSED
+from threading import Thread
 
 import pytest
 import six
 from ephemeral_port_reserve import reserve
+from six.moves.BaseHTTPServer import HTTPServer
+from six.moves.SimpleHTTPServer import SimpleHTTPRequestHandler
 
+from testing import Path
 from testing import run
 from testing import TOP
 from venv_update import colorize
@@ -106,6 +110,8 @@ def start_pypi_server(packages, port, pypi_fallback):
         # TODO: revert after a new pypiserver is released with this patch:
         # https://github.com/pypiserver/pypiserver/pull/182
         '--fallback-url', 'https://pypi.python.org/simple',
+        # as pypi.org does
+        '--hash-algo', 'sha256',
     )
     if not pypi_fallback:
         cmd += ('--disable-fallback',)
@@ -147,6 +153,31 @@ def pypi_server_with_fallback(pypi_packages, pypi_port):
         yield pypi_url
 
 
+@pytest.fixture
+def file_server(tmpdir):
+    """a static file server which also accepts PUT, serving tmpdir/served; yields its url"""
+    class Handler(SimpleHTTPRequestHandler):
+        def do_PUT(self):
+            path = Path(self.translate_path(self.path))
+            path.write_binary(self.rfile.read(int(self.headers['Content-Length'])), ensure=True)
+            self.send_response(201)
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    with tmpdir.ensure('served', dir=True).as_cwd():
+        server = HTTPServer(('127.0.0.1', 0), Handler)
+        thread = Thread(target=server.serve_forever)
+        thread.start()
+        try:
+            yield 'http://127.0.0.1:{}'.format(server.server_port)
+        finally:
+            server.shutdown()
+            server.server_close()
+            thread.join()
+
+
 def ioerror_to_errno(error):  # :pragma:nocover:  all of these cases are exceptional and quite rare
     if isinstance(error.errno, int):
         return error.errno
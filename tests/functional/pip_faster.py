@@ -16,6 +16,7 @@ from testing import strip_pip_warnings
 from testing import TOP
 from testing import uncolor
 from venv_update import __version__
+from venv_update import load_json
 
 
 def it_shows_help_for_prune():
@@ -143,6 +144,163 @@ def it_caches_downloaded_wheels_extra_index_url(tmpdir):
     assert {wheel.name for wheel in cached_wheels(tmpdir)} == expected
 
 
+@pytest.mark.usefixtures('pypi_server')
+def it_reuses_wheels_downloaded_from_another_index(tmpdir):
+    venv = tmpdir.join('venv')
+    install_coverage()
+
+    pip = venv.join('bin/pip').strpath
+    run(pip, 'install', 'venv-update==' + __version__)
+    pip_faster = venv.join('bin/pip-faster').strpath
+
+    run(pip_faster, 'install', 'wheeled-package')
+    run(pip, 'uninstall', '--yes', 'wheeled-package')
+
+    # the same wheel, served by a new mirror
+    mirror = os.environ['PIP_INDEX_URL'].replace('localhost', '127.0.0.1')
+    out, _ = run(pip_faster, 'install', '--index-url', mirror, 'wheeled-package')
+    assert 'Downloading' not in out
+    assert 'Successfully installed wheeled-package' in out
+
+    assert [wheel.name for wheel in cached_wheels(tmpdir)] == ['wheeled-package', 'wheeled-package']
+    assert len(tmpdir.join('home/.cache/pip-faster/blobs').listdir()) == 1
+
+
+@pytest.mark.usefixtures('pypi_server')
+def it_evicts_unused_wheels_after_installing(tmpdir):
+    venv = tmpdir.join('venv')
+    install_coverage()
+
+    pip = venv.join('bin/pip').strpath
+    run(pip, 'install', 'venv-update==' + __version__)
+    pip_faster = venv.join('bin/pip-faster').strpath
+
+    unused = tmpdir.ensure('home/.cache/pip-faster/wheelhouse/elsewhere/unused-1.0-py2.py3-none-any.whl')
+    unused.setmtime(0)
+
+    out, _ = run(pip_faster, 'install', '--cache-max-age', '30', 'wheeled-package', PIP_CACHE_MAX_SIZE='1G')
+    assert 'Removed 1 files (0 bytes) from the pip-faster cache.' in out
+    assert [wheel.name for wheel in cached_wheels(tmpdir)] == ['wheeled-package']
+
+    with pytest.raises(CalledProcessError) as exc_info:
+        run(pip_faster, 'install', '--cache-max-size', 'lots', 'wheeled-package')
+    _, err = exc_info.value.result
+    assert err.startswith('ERROR: Invalid cache budget: not a size: lots')
+
+
+@pytest.mark.usefixtures('pypi_server')
+def it_caches_wheels_as_they_are_built(tmpdir):
+    venv = tmpdir.join('venv')
+    install_coverage()
+
+    pip = venv.join('bin/pip').strpath
+    run(pip, 'install', 'venv-update==' + __version__)
+
+    uninstallable = tmpdir.join('uninstallable')
+    uninstallable.ensure('setup.py').write('''\
+import sys
+from setuptools import setup
+
+if 'install' in sys.argv:
+    raise SystemExit('this package cannot be installed')
+setup(name='uninstallable', version='1', cmdclass={'bdist_wheel': None})
+''')
+
+    with pytest.raises(CalledProcessError):
+        run(venv.join('bin/pip-faster').strpath, 'install', 'pure-python-package==0.2.1', uninstallable.strpath)
+
+    # the install failed, but the wheel built on its way there is kept
+    assert [wheel.name for wheel in cached_wheels(tmpdir)] == ['pure-python-package']
+
+
+@pytest.mark.usefixtures('pypi_server')
+def it_can_install_cached_wheels_by_hardlink(tmpdir):
+    venv = tmpdir.join('venv')
+    install_coverage()
+
+    pip = venv.join('bin/pip').strpath
+    run(pip, 'install', 'venv-update==' + __version__)
+    pip_faster = venv.join('bin/pip-faster').strpath
+
+    run(pip_faster, 'install', 'pure-python-package==0.2.1')
+    run(pip, 'uninstall', '--yes', 'pure-python-package')
+    run(pip_faster, 'install', '--hardlink-installs', 'pure-python-package==0.2.1')
+
+    site_packages, = venv.join('lib').visit('site-packages')
+    tree, = tmpdir.join('home/.cache/pip-faster/trees').listdir()
+    assert site_packages.join('pure_python_package.py').samefile(tree.join('pure_python_package.py'))
+
+    dist_info = site_packages.join('pure_python_package-0.2.1.dist-info')
+    assert dist_info.join('INSTALLER').read() == 'pip\n'
+    record = dist_info.join('RECORD').read()
+    assert 'pure_python_package.py,sha256=' in record
+    assert '../../../bin/pure-python-script,' in record
+    assert '.pyc,' in record
+
+    run(venv.join('bin/pure-python-script').strpath)
+
+    run(pip, 'uninstall', '--yes', 'pure-python-package')
+    assert not site_packages.join('pure_python_package.py').exists()
+    assert tree.join('pure_python_package.py').exists()
+
+    # and again, from the same tree
+    run(pip_faster, 'install', '--hardlink-installs', 'pure-python-package==0.2.1')
+    assert site_packages.join('pure_python_package.py').samefile(tree.join('pure_python_package.py'))
+
+
+def it_keeps_index_pages(tmpdir, pypi_server):
+    venv = tmpdir.join('venv')
+    install_coverage()
+
+    pip = venv.join('bin/pip').strpath
+    run(pip, 'install', 'venv-update==' + __version__)
+    pip_faster = venv.join('bin/pip-faster').strpath
+    cache = tmpdir.join('home/.cache/pip-faster')
+    # with credentials, which are kept out of the cache
+    index_url = pypi_server.replace('://', '://user:secret@', 1) + '/simple'
+
+    def install(*args):
+        run(pip_faster, 'install', '--upgrade', '--index-url', index_url, *(args + ('many_versions_package',)))
+        return load_json(cache.join('stats.json').strpath).get('index_page_hits', 0)
+
+    assert install() == 0
+    pages = cache.join('index-pages').listdir()
+    assert pages
+    assert not [page for page in pages if 'secret' in page.read()]
+
+    # reused, without asking the index, for as long as we allow
+    hits = install('--index-cache-ttl', '600')
+    assert hits > 0
+    assert 'many-versions-package==' in pip_freeze(str(venv))
+    # but by default, always revalidated
+    assert install() == hits
+
+
+@pytest.mark.usefixtures('pypi_server')
+def it_installs_offline_from_the_cache(tmpdir):
+    venv = tmpdir.join('venv')
+    install_coverage()
+
+    pip = venv.join('bin/pip').strpath
+    run(pip, 'install', 'venv-update==' + __version__)
+    pip_faster = venv.join('bin/pip-faster').strpath
+
+    run(pip_faster, 'install', 'dependant_package')
+    run(
+        pip, 'uninstall', '--yes',
+        'dependant_package', 'implicit_dependency', 'many_versions_package', 'pure_python_package',
+    )
+
+    # unpinned, and with their dependencies, from the cache alone
+    run(pip_faster, 'install', '--offline', 'dependant_package')
+    assert 'dependant-package==1' in pip_freeze(str(venv)).split('\n')
+
+    with pytest.raises(CalledProcessError) as excinfo:
+        run(pip_faster, 'install', '--offline', 'dependant_package', 'project_with_c', 'pure_python_package==0.1.0')
+    _, err = excinfo.value.result
+    assert 'Offline, and missing from the pip-faster cache: project_with_c, pure_python_package==0.1.0' in err
+
+
 @pytest.mark.usefixtures('pypi_server')
 def it_doesnt_wheel_local_dirs(tmpdir):
     venv = tmpdir.join('venv')
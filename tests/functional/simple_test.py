@@ -2,6 +2,7 @@ from __future__ import absolute_import
 from __future__ import print_function
 from __future__ import unicode_literals
 
+import os
 import re
 import sys
 from subprocess import CalledProcessError
@@ -9,6 +10,7 @@ from subprocess import CalledProcessError
 import pytest
 from py._path.local import LocalPath as Path
 
+import pip_faster
 from testing import cached_wheels
 from testing import enable_coverage
 from testing import install_coverage
@@ -147,7 +149,7 @@ def test_doesnt_use_cache_without_index_server(tmpdir):
 
 
 @pytest.mark.usefixtures('pypi_server', 'pypi_packages')
-def test_extra_index_url_doesnt_cache(tmpdir):
+def test_extra_index_url_caches_by_source_index(tmpdir):
     tmpdir.chdir()
     enable_coverage()
     install_coverage()
@@ -158,7 +160,12 @@ def test_extra_index_url_doesnt_cache(tmpdir):
         '--extra-index-url=https://pypi.python.org/simple',
     )
 
-    assert not tuple(cached_wheels(tmpdir))
+    # found on our (main) index, then built
+    assert [wheel.name for wheel in cached_wheels(tmpdir)] == ['pure-python-package']
+    wheelhouse = tmpdir.join('home/.cache/pip-faster/wheelhouse')
+    index_url = os.environ['PIP_INDEX_URL']
+    view = pip_faster.wheel_view_path(index_url, 'pure_python_package-0.2.1-py2.py3-none-any.whl', wheelhouse.strpath)
+    assert [path.strpath for path in wheelhouse.join(index_url).visit('*.whl')] == [os.path.normpath(view)]
 
 
 @pytest.mark.usefixtures('pypi_server_with_fallback')
@@ -474,3 +481,102 @@ def test_has_extras(tmpdir):
                 ''
             ))
             assert pip_freeze() == expected
+
+
+@pytest.mark.usefixtures('pypi_server')
+def test_unchanged_requirements_skip_install(tmpdir):
+    with tmpdir.as_cwd():
+        enable_coverage()
+        requirements('-r requirements2.txt')
+        Path('requirements2.txt').write('pure-python-package==0.2.1')
+
+        out, _ = venv_update()
+        assert '> pip install venv-update' in uncolor(out)
+        assert 'skipping install' not in out
+
+        out, _ = venv_update()
+        out = uncolor(out)
+        assert 'Requirements unchanged since previous run; skipping install.\n' in out
+        assert '> pip install' not in out
+        assert '> pip-faster install' not in out
+
+        # a change to a nested requirements file is noticed
+        Path('requirements2.txt').write('pure-python-package==0.1.0')
+        out, _ = venv_update()
+        assert 'skipping install' not in out
+        assert 'pure-python-package==0.1.0' in pip_freeze()
+
+        # so is a change to the installed packages
+        run('venv/bin/pip', 'uninstall', '--yes', 'pure-python-package')
+        out, _ = venv_update()
+        assert 'skipping install' not in out
+        assert 'pure-python-package==0.1.0' in pip_freeze()
+
+
+@pytest.mark.usefixtures('pypi_server')
+def test_bootstrap_already_satisfied(tmpdir):
+    with tmpdir.as_cwd():
+        enable_coverage()
+        requirements('')
+
+        out, _ = venv_update()
+        assert '\n> pip install venv-update==%s\n' % __version__ in uncolor(out)
+
+        requirements('pure-python-package')
+        out, _ = venv_update()
+        out = uncolor(out)
+        assert '\nBootstrap requirements already satisfied: venv-update==%s\n' % __version__ in out
+        assert '> pip install' not in out
+        assert 'pure-python-package==0.2.1' in pip_freeze()
+
+
+@pytest.mark.usefixtures('pypi_server')
+def test_bootstrap_in_process(tmpdir):
+    with tmpdir.as_cwd():
+        enable_coverage()
+        requirements('pure-python-package')
+        venv_update()
+
+        requirements('pure-python-package\nimplicit-dependency')
+        bootstrap_deps = ('venv-update==' + __version__, 'many-versions-package==1')
+        out, err = venv_update('bootstrap-deps=', *bootstrap_deps)
+        out = uncolor(out)
+        assert (
+            '\n> pip-faster bootstrap-deps= venv-update==%s many-versions-package==1 '
+            'pip-command= install --upgrade --prune -r requirements.txt\n' % __version__
+        ) in out
+        assert '\n> pip install' not in out
+        assert 'Successfully installed many-versions-package-1\n' in out
+        assert pip_freeze() == '\n'.join((
+            'implicit-dependency==1',
+            'pure-python-package==0.2.1',
+            'venv-update==' + __version__,
+            ''
+        ))
+
+
+@pytest.mark.usefixtures('pypi_server')
+def test_bootstrap_replaces_pip_faster(tmpdir):
+    """When the bootstrap changes pip-faster itself, the install is run by the new one, not by our stale modules."""
+    with tmpdir.as_cwd():
+        enable_coverage()
+        requirements('pure-python-package')
+        venv_update()
+
+        old = tmpdir.join('old-venv-update')
+        old.join('setup.py').write(
+            'from setuptools import setup\n'
+            "setup(name='venv-update', version='3.2.4', py_modules=['pip_faster'], "
+            "entry_points={'console_scripts': ['pip-faster = pip_faster:main']})\n",
+            ensure=True,
+        )
+        old.join('pip_faster.py').write(
+            'import sys\n'
+            'def main():\n'
+            "    print('old pip-faster: ' + ' '.join(sys.argv[1:]))\n"
+        )
+        out, err = venv_update('bootstrap-deps=', old.strpath)
+        out = uncolor(out)
+        assert '\n> pip-faster install --upgrade --prune -r requirements.txt\n' in out
+        assert '\nold pip-faster: install --upgrade --prune -r requirements.txt\n' in out
+        assert 'venv-update==3.2.4' in pip_freeze()
@@ -164,7 +164,7 @@ def test_update_invalidated_missing_activate(tmpdir):
 
         out, err = venv_update()
         err = strip_pip_warnings(err)
-        assert err.strip() == "sh: 1: .: Can't open venv/bin/activate"
+        assert err == ''
         out = uncolor(out)
         assert out.startswith('''\
 > virtualenv venv
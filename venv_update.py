@@ -143,14 +143,18 @@ def colorize(cmd):
 
 def run(cmd):
     from subprocess import check_call
-    check_call(('echo', colorize(cmd)))
+    info(colorize(cmd))
     check_call(cmd)
 
 
 def info(msg):
-    # use a subprocess to ensure correct output interleaving.
-    from subprocess import check_call
-    check_call(('echo', msg))
+    # flush every line, so that our output is correctly interleaved with any subprocess output.
+    from sys import stdout
+    msg += '\n'
+    if str is bytes:  # :pragma:nocover: py2
+        msg = msg.encode('UTF-8')
+    stdout.write(msg)
+    stdout.flush()
 
 
 def check_output(cmd):
@@ -194,6 +198,7 @@ class Scratch(object):
         self.venv = join(self.dir, 'venv')
         self.python = venv_python(self.venv)
         self.src = join(self.dir, 'src')
+        self.interpreters = join(self.dir, 'interpreters.json')
 
 
 def exec_scratch_virtualenv(args):
@@ -228,23 +233,141 @@ def exec_scratch_virtualenv(args):
     sys.path[0] = scratch.src
 
 
-def get_original_path(venv_path):  # TODO-TEST: a unit test
-    """This helps us know whether someone has tried to relocate the virtualenv"""
-    return check_output(('sh', '-c', '. %s; printf "$VIRTUAL_ENV"' % venv_executable(venv_path, 'activate')))
+def _activate_origin(activate):
+    """The $VIRTUAL_ENV recorded by bin/activate"""
+    import io
+    import re
+    with io.open(activate, encoding='UTF-8', errors='replace') as activate_file:
+        match = re.search(
+            r'''^VIRTUAL_ENV=(?:'([^']*)'|"([^"$`\\]*)"|([^'"$`\\\s]+))\s*$''',
+            activate_file.read(),
+            re.MULTILINE,
+        )
+    if match:
+        return next(group for group in match.groups() if group is not None)
+
+
+def _pyvenv_cfg_origin(venv_path):
+    """The destination recorded by `python -m venv` (3.11+) in pyvenv.cfg"""
+    import io
+    pyvenv_cfg = join(venv_path, 'pyvenv.cfg')
+    if not exists(pyvenv_cfg):
+        return None
+    with io.open(pyvenv_cfg, encoding='UTF-8', errors='replace') as pyvenv_cfg_file:
+        for line in pyvenv_cfg_file:
+            key, _, value = line.partition('=')
+            if key.strip() == 'command' and value.split():
+                return value.split()[-1]
+
+
+def _shebang_origin(venv_path, sample=5):
+    """The virtualenv named by the shebang of (a sample of) its scripts"""
+    from os import listdir
+    from os.path import basename, dirname, isfile
+    bin_dir = join(venv_path, 'bin')
+    scripts = [
+        join(bin_dir, script) for script in sorted(listdir(bin_dir))
+        if not script.startswith(('python', 'activate'))
+    ]
+    for script in [script for script in scripts if isfile(script)][:sample]:
+        with open(script, 'rb') as script_file:
+            shebang = script_file.readline().decode('UTF-8', 'replace')
+        if shebang.startswith('#!') and shebang[2:].split():
+            interpreter = shebang[2:].split()[0]
+            if basename(interpreter).startswith(('python', 'pypy')) and basename(dirname(interpreter)) == 'bin':
+                return dirname(dirname(interpreter))
+
+
+def get_original_path(venv_path):
+    """This helps us know whether someone has tried to relocate the virtualenv
+
+    We read the location recorded in bin/activate, rather than sourcing it in a shell. Virtualenvs that don't record it
+    there fall back to pyvenv.cfg, then script shebangs. Returns None if there's no bin/activate.
+    """
+    activate = venv_executable(venv_path, 'activate')
+    if not exists(activate):
+        return None
+    return _activate_origin(activate) or _pyvenv_cfg_origin(venv_path) or _shebang_origin(venv_path)
+
+
+INTERPRETER_INFO_SCRIPT = '''\
+import json, os, platform, sys, sysconfig
+print(json.dumps({
+    "executable": os.path.realpath(sys.executable),
+    "version": ".".join(str(p) for p in sys.version_info),
+    "implementation": platform.python_implementation(),
+    "abi": sysconfig.get_config_var("SOABI") or getattr(sys, "abiflags", ""),
+    "base_prefix": getattr(sys, "real_prefix", getattr(sys, "base_prefix", sys.prefix)),
+}))
+'''
 
 
-def get_python_version(interpreter):
+def load_json(path):
+    import json
+    try:
+        with open(path) as json_file:
+            return json.load(json_file)
+    except (IOError, ValueError):  # missing, or half-written by an older venv-update
+        return {}
+
+
+def dump_json(path, value):
+    """atomically (over)write a json file"""
+    import json
+    from os import getpid, rename
+    from os.path import dirname
+    if not exists(dirname(path)):
+        os.makedirs(dirname(path))
+    tmp = '%s.%i' % (path, getpid())
+    with open(tmp, 'w') as json_file:
+        json.dump(value, json_file, indent=1, sort_keys=True)
+    rename(tmp, path)
+
+
+def interpreter_info(interpreter):
+    """Facts about a python interpreter: version, implementation, abi, and base_prefix.
+
+    These are cached by the identity of the interpreter binary, so that we don't need to start an interpreter to
+    validate a virtualenv. A changed binary gets a new realpath, inode, size or mtime, and is inspected again.
+    Launchers, such as pyenv shims, run some other binary which they may change at any time; they aren't cached.
+    """
     if not exists(interpreter):
         return None
 
-    cmd = (interpreter, '-c', 'import sys; print(".".join(str(p) for p in sys.version_info))')
-    return check_output(cmd).strip()
+    from os import stat
+    from os.path import realpath
+    path = realpath(interpreter)
+    binary = stat(path)
+    identity = [binary.st_ino, binary.st_size, binary.st_mtime]
+
+    cache_path = Scratch().interpreters
+    cache = load_json(cache_path)
+    cached = cache.get(path)
+    if cached is not None and cached['identity'] == identity:
+        return cached['info']
+
+    import json
+    result = json.loads(check_output((interpreter, '-c', INTERPRETER_INFO_SCRIPT)))
+    if result.get('executable') != path:
+        return result
+
+    cache = load_json(cache_path)  # in case another process updated it meanwhile
+    cache[path] = {'identity': identity, 'info': result}
+    dump_json(cache_path, cache)
+    return result
+
+
+def get_python_version(interpreter):
+    facts = interpreter_info(interpreter)
+    if facts is None:
+        return None
+    else:
+        return facts['version']
 
 
 def invalid_virtualenv_reason(venv_path, source_python, destination_python, virtualenv_system_site_packages):
-    try:
-        orig_path = get_original_path(venv_path)
-    except CalledProcessError:
+    orig_path = get_original_path(venv_path)
+    if orig_path is None:
         return 'could not inspect metadata'
     if not samefile(orig_path, venv_path):
         return 'virtualenv moved {} -> {}'.format(timid_relpath(orig_path), timid_relpath(venv_path))
@@ -277,6 +400,75 @@ def invalid_virtualenv_reason(venv_path, source_python, destination_python, virt
         return 'base executable python version changed {} -> {}'.format(destination_version, base_executable_version)
 
 
+def python_option(args):
+    """The value of virtualenv's -p/--python option, if any."""
+    result = None
+    args = iter(args)
+    for arg in args:
+        if arg in ('-p', '--python'):
+            result = next(args, None)
+        elif arg.startswith('--python='):
+            result = arg[len('--python='):]
+        elif arg.startswith('-p'):
+            result = arg[2:]
+    return result
+
+
+def virtualenv_configured_externally():
+    """Is virtualenv configured by environment variables or a config file, rather than just its arguments?"""
+    from os import environ
+    from os.path import expanduser
+    if any(var.startswith('VIRTUALENV_') for var in environ):
+        return True
+    config_dirs = (
+        environ.get('XDG_CONFIG_HOME', expanduser('~/.config')),
+        expanduser('~/Library/Application Support'),  # OS X
+    )
+    return any(exists(join(config_dir, 'virtualenv', 'virtualenv.ini')) for config_dir in config_dirs)
+
+
+class VirtualenvArgs(object):
+    """Answers our questions about some virtualenv arguments.
+
+    Asking virtualenv itself means importing it and doing interpreter discovery, so we only do that when the
+    arguments alone aren't enough, and then at most once.
+    """
+
+    def __init__(self, args):
+        self.args = args
+        self._session = None
+        # argparse allows abbreviated options, which we don't attempt to interpret
+        abbreviated = any(
+            arg.split('=', 1)[0] not in ('--python', '--system-site-packages')
+            for arg in args if arg.startswith(('--py', '--sys'))
+        )
+        self.simple = not abbreviated and not virtualenv_configured_externally()
+
+    @property
+    def session(self):
+        if self._session is None:
+            import virtualenv
+            self._session = virtualenv.session_via_cli(self.args)
+        return self._session
+
+    def source_python(self):
+        """the interpreter we're instructing virtualenv to copy"""
+        python = python_option(self.args)
+        if python is None:
+            return None
+        elif self.simple and '/' in python and exists(python):
+            return python
+        else:
+            # a bare name (e.g. python3) is a spec: virtualenv prefers the running interpreter, if it satisfies it
+            return self.session._interpreter.executable
+
+    def system_site_packages(self):
+        if self.simple:
+            return '--system-site-packages' in self.args
+        else:
+            return self.session.creator.enable_system_site_package
+
+
 def ensure_virtualenv(args, return_values):
     """Ensure we have a valid virtualenv."""
 
@@ -284,8 +476,6 @@ def ensure_virtualenv(args, return_values):
     argv[:] = ('virtualenv',) + args
     info(colorize(argv))
 
-    import virtualenv
-
     run_virtualenv = True
     filtered_args = [a for a in args if not a.startswith('-')]
     if filtered_args:
@@ -297,21 +487,17 @@ def ensure_virtualenv(args, return_values):
         # Validate existing virtualenv if there is one
         # there are two python interpreters involved here:
         # 1) the interpreter we're instructing virtualenv to copy
-        python_options_arg = [a for a in args if a.startswith('-p') or a.startswith('--python')]
-        if not python_options_arg:
-            source_python = None
-        else:
-            virtualenv_session = virtualenv.session_via_cli(args)
-            source_python = virtualenv_session._interpreter.executable
         # 2) the interpreter virtualenv will create
         destination_python = venv_python(venv_path)
 
         if exists(destination_python):
-            # Check if --system-site-packages is a passed-in option
-            dummy_session = virtualenv.session_via_cli(args)
-            virtualenv_system_site_packages = dummy_session.creator.enable_system_site_package
-
-            reason = invalid_virtualenv_reason(venv_path, source_python, destination_python, virtualenv_system_site_packages)
+            virtualenv_args = VirtualenvArgs(args)
+            reason = invalid_virtualenv_reason(
+                venv_path,
+                virtualenv_args.source_python(),
+                destination_python,
+                virtualenv_args.system_site_packages(),
+            )
             if reason:
                 info('Removing invalidated virtualenv. (%s)' % reason)
                 run(('rm', '-rf', venv_path))
@@ -320,6 +506,7 @@ def ensure_virtualenv(args, return_values):
                 run_virtualenv = False  # looks good! we're done here.
 
     if run_virtualenv:
+        import virtualenv
         raise_on_failure(lambda: virtualenv.cli_run(args), ignore_return=True)
 
     # There might not be a venv_path if doing something like "venv= --version"
@@ -328,6 +515,144 @@ def ensure_virtualenv(args, return_values):
         run(('rm', '-rf', join(return_values.venv_path, 'local')))
 
 
+REQUIREMENT_FILE_OPTIONS = ('-r', '--requirement', '-c', '--constraint')
+EDITABLE_OPTIONS = ('-e', '--editable')
+# pip options whose (separate) value is not a requirement
+VALUE_OPTIONS = frozenset((
+    '-i', '--index-url', '--extra-index-url', '-f', '--find-links', '--trusted-host',
+    '--cert', '--client-cert', '--proxy', '--src', '-t', '--target', '--prefix', '--root',
+    '--cache-dir', '--log', '-b', '--build', '--upgrade-strategy', '--no-binary', '--only-binary',
+    '--global-option', '--install-option', '--hash', '--platform', '--python-version',
+    '--implementation', '--abi', '--progress-bar', '--timeout', '--retries', '--exists-action',
+))
+
+
+def _option_value(arg, options):
+    """Return (option, value) when arg is one of options, with or without an attached value."""
+    for option in options:
+        if arg == option:
+            return option, None
+        elif option.startswith('--') and arg.startswith(option + '='):
+            return option, arg[len(option) + 1:]
+        elif not option.startswith('--') and arg.startswith(option):
+            return option, arg[len(option):]
+    return None, None
+
+
+def _is_local_or_url(arg):
+    return '://' in arg or arg.startswith(('.', '/', '~', 'file:'))
+
+
+def _requirement_file_args(filename):
+    """The (whitespace-separated) arguments in a requirements file"""
+    import io
+    result = []
+    with io.open(filename, encoding='UTF-8', errors='replace') as requirements:
+        for line in requirements:
+            line = line.split(' #', 1)[0].strip()
+            if line and not line.startswith('#'):
+                result.extend(line.split())
+    return result
+
+
+def requirement_files(args, relative_to='', result=None):
+    """List the requirement and constraint files named by some pip arguments, following nested includes.
+
+    Returns None if any requirement can't be fingerprinted by content alone: editables, local paths and urls.
+    """
+    from os.path import dirname, normpath
+    if result is None:
+        result = []
+    args = iter(args)
+    for arg in args:
+        if _option_value(arg, EDITABLE_OPTIONS)[0]:
+            return None
+        option, value = _option_value(arg, REQUIREMENT_FILE_OPTIONS)
+        if option is None:
+            if arg in VALUE_OPTIONS:
+                next(args, None)
+            elif _is_local_or_url(arg):
+                return None
+            continue
+        if value is None:
+            value = next(args, None)
+            if value is None:  # a trailing -r, naming no file: pip will refuse it
+                return None
+        if '://' in value:
+            return None
+
+        filename = normpath(join(relative_to, value))
+        if filename in result:
+            continue  # already seen; includes may be circular
+        result.append(filename)
+        if not exists(filename) or requirement_files(_requirement_file_args(filename), dirname(filename), result) is None:
+            return None
+    return result
+
+
+def fingerprint_path(venv_path):
+    return join(venv_path, 'venv-update.fingerprint')
+
+
+def venv_fingerprint(venv_path, install, pip_command, bootstrap_deps, environ):
+    """A digest of everything that determines the result of the install phase.
+
+    Returns None if we can't tell whether the install would be a no-op.
+    """
+    files = requirement_files(install + bootstrap_deps)
+    if files is None:
+        return None
+
+    from glob import glob
+    from hashlib import sha256
+    from os import stat
+    from os.path import realpath
+    digest = sha256()
+
+    def update(*parts):
+        digest.update(repr(parts).encode('UTF-8'))
+
+    update(__version__, install, pip_command, bootstrap_deps)
+    update(*sorted((key, value) for key, value in environ.items() if key.startswith('PIP_')))
+    for filename in files:
+        update(realpath(filename))
+        with open(filename, 'rb') as requirements:
+            digest.update(requirements.read())
+
+    # the interpreter identity
+    pyvenv_cfg_path = join(venv_path, 'pyvenv.cfg')
+    if exists(pyvenv_cfg_path):
+        with open(pyvenv_cfg_path, 'rb') as pyvenv_cfg:
+            digest.update(pyvenv_cfg.read())
+    python = realpath(venv_python(venv_path))
+    python_stat = stat(python)
+    update(python, python_stat.st_ino, python_stat.st_size, python_stat.st_mtime)
+
+    # any install or uninstall since our last run changes the site-packages listing
+    for site_packages in sorted(glob(join(venv_path, 'lib', '*', 'site-packages'))):
+        update(site_packages, stat(site_packages).st_mtime)
+
+    return digest.hexdigest()
+
+
+def read_fingerprint(venv_path):
+    try:
+        with open(fingerprint_path(venv_path)) as fingerprint:
+            return fingerprint.read().strip()
+    except IOError:
+        return None
+
+
+def write_fingerprint(venv_path, fingerprint):
+    path = fingerprint_path(venv_path)
+    if fingerprint is None:
+        if exists(path):
+            os.remove(path)
+    else:
+        with open(path, 'w') as fingerprint_file:
+            fingerprint_file.write(fingerprint + '\n')
+
+
 def wait_for_all_subprocesses():
     from os import wait
     try:
@@ -401,12 +726,23 @@ def venv_update(
     class return_values(object):
         venv_path = None
 
+    # pip_faster modifies the environment; fingerprint what the user gave us
+    environ = dict(os.environ)
+
     try:
         ensure_virtualenv(venv, return_values)
         if return_values.venv_path is None:
             return
         # invariant: the final virtualenv exists, with the right python version
-        raise_on_failure(lambda: pip_faster(return_values.venv_path, pip_command, install, bootstrap_deps))
+        venv_path = return_values.venv_path
+        fingerprint = venv_fingerprint(venv_path, install, pip_command, bootstrap_deps, environ)
+        if fingerprint is not None and fingerprint == read_fingerprint(venv_path):
+            info('Requirements unchanged since previous run; skipping install.')
+        else:
+            write_fingerprint(venv_path, None)
+            raise_on_failure(lambda: pip_faster(venv_path, pip_command, install, bootstrap_deps))
+            # the install itself changes site-packages, so we fingerprint its result
+            write_fingerprint(venv_path, venv_fingerprint(venv_path, install, pip_command, bootstrap_deps, environ))
     except BaseException:
         mark_venv_invalid(return_values.venv_path)
         raise
@@ -430,14 +766,135 @@ def pip_faster(venv_path, pip_command, install, bootstrap_deps):
     from os import environ
     environ['PIP_DISABLE_PIP_VERSION_CHECK'] = '1'
 
-    # we always have to run the bootstrap, because the presense of an
-    # executable doesn't imply the right version. pip is able to validate the
-    # version in the fastpath case quickly anyway.
-    run(('pip', 'install') + bootstrap_deps)
+    # the presence of an executable doesn't imply the right version, so we
+    # check the installed metadata, and leave anything non-trivial to pip.
+    if bootstrap_satisfied(venv_path, bootstrap_deps):
+        info('Bootstrap requirements already satisfied: %s' % shellescape(bootstrap_deps))
+    elif pip_command[:1] == ('pip-faster',) and bootstrap_satisfied(venv_path, DEFAULT_OPTION_VALUES['bootstrap-deps=']):
+        # our pip-faster is already installed: bootstrap and install in a single process,
+        # unless the bootstrap replaces pip-faster or its tools, in which case it hands the install over to the new one
+        run(('pip-faster', 'bootstrap-deps=') + bootstrap_deps + ('pip-command=',) + pip_command[1:] + install)
+        return
+    else:
+        run(('pip', 'install') + bootstrap_deps)
 
     run(pip_command + install)
 
 
+def normalize_name(name):
+    """Normalize a python package name a la PEP 503"""
+    # https://www.python.org/dev/peps/pep-0503/#normalized-names
+    import re
+    return re.sub('[-_.]+', '-', name).lower()
+
+
+def simple_version(version):
+    """A comparable form of a dotted-numeric version, or None for anything fancier."""
+    parts = version.strip().split('.')
+    if not all(part.isdigit() for part in parts):
+        return None
+    parts = [int(part) for part in parts]
+    while len(parts) > 1 and parts[-1] == 0:
+        parts.pop()
+    return tuple(parts)
+
+
+def version_satisfies(version, specifiers):
+    """Does a version satisfy some comma-separated specifiers? None if we can't tell."""
+    import operator
+    import re
+    operators = {
+        '==': operator.eq, '!=': operator.ne,
+        '<=': operator.le, '>=': operator.ge,
+        '<': operator.lt, '>': operator.gt,
+    }
+    version = simple_version(version)
+    if version is None:
+        return None
+    for specifier in specifiers.split(','):
+        if not specifier.strip():
+            continue
+        match = re.match(r'^\s*(==|!=|<=|>=|<|>)\s*([0-9.]+)\s*$', specifier)
+        if match is None:
+            return None
+        op, other = match.groups()
+        other = simple_version(other)
+        if other is None:
+            return None
+        if not operators[op](version, other):
+            return False
+    return True
+
+
+def installed_distributions(venv_path):
+    """Map each (normalized) distribution name installed in a virtualenv to its version and metadata file."""
+    from glob import glob
+    from os.path import basename
+    result = {}
+    for site_packages in glob(join(venv_path, 'lib', '*', 'site-packages')):
+        for metadata in glob(join(site_packages, '*.dist-info', 'METADATA')):
+            distribution = basename(metadata[:-len('.dist-info/METADATA')])
+            name, _, version = distribution.partition('-')
+            result[normalize_name(name)] = (version, metadata)
+    return result
+
+
+def _requires_dist(metadata):
+    """The Requires-Dist of some METADATA, as (name, specifiers) pairs. None if we can't interpret them."""
+    import re
+    result = []
+    with open(metadata, 'rb') as metadata_file:
+        for line in metadata_file:
+            line = line.decode('UTF-8', 'replace').rstrip()
+            if not line:
+                break  # the end of the headers
+            elif not line.startswith('Requires-Dist:'):
+                continue
+            requirement, _, marker = line[len('Requires-Dist:'):].partition(';')
+            if marker.strip():
+                if re.search(r'\bextra\s*==', marker) and ' or ' not in marker:
+                    continue  # we don't bootstrap extras
+                return None
+            match = re.match(r'^\s*([A-Za-z0-9][A-Za-z0-9._-]*)\s*\(?([^()\[]*)\)?\s*$', requirement)
+            if match is None:
+                return None
+            result.append(match.groups())
+    return result
+
+
+def bootstrap_satisfied(venv_path, bootstrap_deps):
+    """Are these bootstrap requirements already installed, along with their dependencies?
+
+    We only handle simple name==version pins. Anything else (urls, editables, ranges, options) is left to pip.
+    """
+    import re
+    installed = installed_distributions(venv_path)
+    todo = []
+    for dep in bootstrap_deps:
+        match = re.match(r'^([A-Za-z0-9][A-Za-z0-9._-]*)(==[0-9.]+)$', dep)
+        if match is None:
+            return False
+        todo.append(match.groups())
+
+    seen = set()
+    while todo:
+        name, specifiers = todo.pop()
+        name = normalize_name(name)
+        if name not in installed:
+            return False
+        version, metadata = installed[name]
+        if not version_satisfies(version, specifiers):
+            return False
+        if name in seen:
+            continue
+        seen.add(name)
+        requires = _requires_dist(metadata)
+        if requires is None:
+            return False
+        todo.extend(requires)
+    return True
+
+
 def raise_on_failure(mainfunc, ignore_return=False):
     """raise if and only if mainfunc fails"""
     try: